@@ -0,0 +1,171 @@
+import asyncio
+import os
+import random
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Config
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "50"))
+MAX_SPEECH_STREAMS = int(os.getenv("MAX_SPEECH_STREAMS", "50"))
+MAX_LLM_INFLIGHT = int(os.getenv("MAX_LLM_INFLIGHT", "20"))
+ADMISSION_QUEUE_MAX = int(os.getenv("ADMISSION_QUEUE_MAX", "20"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+RETRY_AFTER_BASE = 15
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Caps live /ws sessions against speech and LLM capacity.
+
+    Only new sessions wait or get rejected; sessions already admitted are
+    never evicted. All methods run on the event loop, so plain counters are safe.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_speech_streams: int = MAX_SPEECH_STREAMS,
+                 max_llm_inflight: int = MAX_LLM_INFLIGHT, queue_max: int = ADMISSION_QUEUE_MAX,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.max_speech_streams = max_speech_streams
+        self.max_llm_inflight = max_llm_inflight
+        self.queue_max = queue_max
+        self.queue_timeout = queue_timeout
+        self.sessions = 0
+        self.speech_streams = 0     # Speech API streams actually open right now
+        self.stream_opens_total = 0 # Includes re-opens after stream errors/limits
+        self.llm_inflight = 0
+        self.admitted_total = 0
+        self.rejected_total = 0
+        self.draining = False
+        self.drain_retry_spread = 0.0
+        self._waiters = deque()
+
+    def has_capacity(self) -> bool:
+        return (not self.draining
+                and self.sessions < self.max_sessions
+                and self.speech_streams < self.max_speech_streams
+                # A backed-up LLM queue means existing sessions are already slow
+                and self.llm_inflight < self.max_llm_inflight)
+
+    def retry_after(self) -> int:
+        # Scale with backlog and jitter so rejected clients don't retry in lockstep
+        backlog = len(self._waiters) / max(1, self.max_sessions)
+        return int(RETRY_AFTER_BASE * (1 + backlog) * random.uniform(0.75, 1.5))
+
+    def _rejection(self, reason: str):
+        self.rejected_total += 1
+        if self.draining:
+            # Another worker will take them; spread the reconnects out
+            return AdmissionRejected("server draining", int(random.uniform(1, max(1, self.drain_retry_spread))))
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _reject(self, reason: str):
+        raise self._rejection(reason)
+
+    def begin_drain(self, retry_spread: float):
+        """Stop admitting sessions and turn away everyone still queued.
+
+        Turned-away clients are told to retry within `retry_spread` seconds.
+        """
+        self.draining = True
+        self.drain_retry_spread = retry_spread
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(self._rejection("server draining"))
+
+    def _grant(self):
+        self.sessions += 1
+        self.admitted_total += 1
+
+    async def acquire(self, on_queued=None):
+        """Admit a new session, waiting in FIFO order if at capacity.
+
+        `on_queued(position)` is awaited once if the caller has to wait.
+        Raises AdmissionRejected when the queue is full or the wait times out.
+        """
+        if self.draining:
+            self._reject("server draining")
+        if self.has_capacity() and not self._waiters:
+            self._grant()
+            return
+        if len(self._waiters) >= self.queue_max:
+            self._reject("server at capacity")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if on_queued:
+                await on_queued(len(self._waiters))
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            self._reject("timed out waiting for capacity")
+        except BaseException:
+            # Caller went away while queued; hand back a slot we may have been granted
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+
+    def release(self):
+        self.sessions = max(0, self.sessions - 1)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._grant()
+                waiter.set_result(True)
+
+    def speech_started(self):
+        self.speech_streams += 1
+        self.stream_opens_total += 1
+
+    def speech_stopped(self):
+        self.speech_streams = max(0, self.speech_streams - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def llm_call(self):
+        self.llm_inflight += 1
+        try:
+            yield
+        finally:
+            self.llm_inflight -= 1
+            self._wake()
+
+    def load_factor(self) -> float:
+        return round(max(
+            self.sessions / max(1, self.max_sessions),
+            self.speech_streams / max(1, self.max_speech_streams),
+            self.llm_inflight / max(1, self.max_llm_inflight),
+        ), 3)
+
+    def snapshot(self):
+        return {
+            "sessions": self.sessions,
+            "max_sessions": self.max_sessions,
+            "speech_streams": self.speech_streams,
+            "max_speech_streams": self.max_speech_streams,
+            "stream_opens_total": self.stream_opens_total,
+            "llm_inflight": self.llm_inflight,
+            "max_llm_inflight": self.max_llm_inflight,
+            "queued": len(self._waiters),
+            "admitted_total": self.admitted_total,
+            "rejected_total": self.rejected_total,
+            "load_factor": self.load_factor(),
+            "draining": self.draining,
+            "accepting": self.has_capacity(),
+        }
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import answer_cache
+import context_index
+from shared_state import WORKER_ID
+
+logger = logging.getLogger(__name__)
+
+# Config
+QUESTIONS_PER_BATCH = 6
+# Bank questions are LLM-worded, so they rarely match the spoken one closely. Matching
+# leans on content words instead: most of the asked question's terms must appear in the
+# banked one (and half of the banked one's in the asked). Refinement replaces the card.
+BANK_SIMILARITY_THRESHOLD = 0.45
+BANK_MIN_CONTAINMENT = 0.75
+BANK_MIN_REVERSE_CONTAINMENT = 0.5
+MAX_BANKS = 32
+RESUME_TOKEN_BUDGET = 1500      # Per batch prompt; sections picked by relevance to the category
+JD_TOKEN_BUDGET = 1000
+BUILD_LOCK_TTL_SECONDS = 300    # Build lock / "building" status lease, renewed after every batch
+SYNC_INTERVAL_SECONDS = 2       # Min gap between shared-state reads for a bank another worker builds
+
+# One batched LLM call per category
+CATEGORIES = [
+    ("intro", "opening and 'tell me about yourself' style questions"),
+    ("behavioral", "behavioral questions (conflict, failure, leadership, teamwork)"),
+    ("resume", "deep-dive questions about the specific projects and roles on the resume"),
+    ("technical", "technical questions on the core skills the job description asks for"),
+    ("fit", "motivation, company fit and closing questions"),
+]
+
+
+def bank_overlap(asked: frozenset, stored: frozenset) -> float:
+    if answer_cache.term_containment(stored, asked) < BANK_MIN_REVERSE_CONTAINMENT:
+        return 0.0
+    return answer_cache.term_containment(asked, stored)
+
+
+def _parse_json(text: str):
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif text.startswith("```"):
+        text = text.strip("`")
+    return json.loads(text)
+
+
+def build_batch_prompt(category_desc: str, resume: str, jd: str, company: str) -> str:
+    return f"""
+        You are the candidate preparing for a job interview at {company}.
+        List the {QUESTIONS_PER_BATCH} most likely {category_desc} for this RESUME and JOB DESCRIPTION,
+        and answer each one as the candidate.
+
+        RESUME:
+        {resume}
+
+        JOB DESCRIPTION:
+        {jd}
+
+        RULES:
+        - Answer in the FIRST PERSON, sticking to the facts in the RESUME.
+        - Be friendly, professional and conversational; 3-6 sentences per answer.
+
+        OUTPUT FORMAT (JSON ONLY):
+        {{
+            "items": [
+                {{"question": "<string>", "answer": "<string>"}}
+            ]
+        }}
+        """
+
+
+class AnswerBank:
+    """Precomputed answers for one resume/JD pair."""
+
+    def __init__(self, ctx_key: str):
+        self.ctx_key = ctx_key
+        self.index = answer_cache.SimilarityIndex(capacity=QUESTIONS_PER_BATCH * len(CATEGORIES))
+        self.state = "pending"      # pending -> building -> ready | failed
+        self.categories_done = []
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.lookups = 0
+        self.hits = 0
+        self.follower = False       # True when another worker is building it
+        self._lock = threading.Lock()
+
+    def add_items(self, items):
+        with self._lock:
+            for item in items:
+                question = (item.get("question") or "").strip()
+                answer = (item.get("answer") or "").strip()
+                key = answer_cache.normalize_question(question)
+                if key and answer:
+                    self.index.add(key, answer_cache.embed(question), {"question": question, "answer": answer},
+                                   answer_cache.content_terms(question))
+
+    def match(self, question: str):
+        vec = answer_cache.embed(question)
+        terms = answer_cache.content_terms(question)
+        with self._lock:
+            self.lookups += 1
+            if answer_cache.is_followup(question):
+                return None
+            hit = self.index.search(vec, BANK_SIMILARITY_THRESHOLD, terms, bank_overlap, BANK_MIN_CONTAINMENT)
+            if hit:
+                self.hits += 1
+                return hit[0]
+        return None
+
+    def status(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "progress": round(len(self.categories_done) / len(CATEGORIES), 2),
+                "categories_done": list(self.categories_done),
+                "questions": len(self.index),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "coverage": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "build_seconds": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else 0.0,
+                "error": self.error,
+            }
+
+
+class AnswerBankRegistry:
+    """Holds the most recent banks and runs their build jobs.
+
+    With a `shared` state backend, only one worker builds a given bank; it
+    publishes each finished batch and the others load them on lookup. The build
+    lock and the "building" status expire after BUILD_LOCK_TTL_SECONDS unless
+    refreshed, so a builder that dies mid-build doesn't block the context forever.
+    Shared-state I/O runs in a thread, never on the event loop.
+    """
+
+    def __init__(self, max_banks: int = MAX_BANKS, shared=None):
+        self.max_banks = max_banks
+        self.shared = shared
+        self._banks = OrderedDict()
+        self._tasks = {}
+        self._synced_at = {}
+        # Batch calls take seconds each; keep them off the default executor that to_thread users share
+        self._executor = ThreadPoolExecutor(max_workers=len(CATEGORIES), thread_name_prefix="answer-bank")
+
+    def _store(self, bank: AnswerBank):
+        self._banks[bank.ctx_key] = bank
+        while len(self._banks) > self.max_banks:
+            old_key, _ = self._banks.popitem(last=False)
+            self._synced_at.pop(old_key, None)
+            task = self._tasks.pop(old_key, None)
+            if task:
+                task.cancel()
+
+    def get(self, ctx_key: str):
+        """Local lookup only; see `lookup()` for banks another worker is building."""
+        bank = self._banks.get(ctx_key)
+        if bank:
+            self._banks.move_to_end(ctx_key)
+        return bank
+
+    async def lookup(self, ctx_key: str):
+        bank = self._banks.get(ctx_key)
+        following = bank is None or (bank.follower and bank.state in ("pending", "building"))
+        if self.shared is not None and following and time.time() - self._synced_at.get(ctx_key, 0) >= SYNC_INTERVAL_SECONDS:
+            known = list(bank.categories_done) if bank else []
+            status, batches = await asyncio.to_thread(self._fetch_shared, ctx_key, known)
+            self._synced_at[ctx_key] = time.time()
+            bank = self._apply_shared(ctx_key, self._banks.get(ctx_key), status, batches)
+        return self.get(ctx_key) if bank else None
+
+    def _fetch_shared(self, ctx_key: str, known):
+        status = self.shared.get("answer_bank", ctx_key)
+        if status is None:
+            return None, {}
+        batches = {
+            name: self.shared.get("answer_bank_items", f"{ctx_key}:{name}") or []
+            for name in status["categories_done"] if name not in known
+        }
+        return status, batches
+
+    def _apply_shared(self, ctx_key: str, bank, status, batches):
+        if status is None:
+            if bank is not None and bank.follower and bank.state in ("pending", "building"):
+                # Builder's status expired without finishing: forget it so a rebuild can claim the lock
+                self._banks.pop(ctx_key, None)
+                return None
+            return bank
+        if bank is None:
+            bank = AnswerBank(ctx_key)
+            bank.follower = True
+            self._store(bank)
+        for name, items in batches.items():
+            if name not in bank.categories_done:
+                bank.add_items(items)
+                with bank._lock:
+                    bank.categories_done.append(name)
+        bank.state = status["state"]
+        bank.error = status["error"]
+        bank.started_at = time.time() - status["build_seconds"]
+        return bank
+
+    def _publish(self, bank: AnswerBank, name: str = None, items=None):
+        if self.shared is None:
+            return
+        if name is not None:
+            self.shared.set("answer_bank_items", f"{bank.ctx_key}:{name}", items)
+        status = bank.status()
+        building = status["state"] in ("pending", "building")
+        # While building, status and lock are leases the builder keeps renewing
+        self.shared.set("answer_bank", bank.ctx_key, status, ttl=BUILD_LOCK_TTL_SECONDS if building else None)
+        if building:
+            self.shared.set("answer_bank_lock", bank.ctx_key, WORKER_ID, ttl=BUILD_LOCK_TTL_SECONDS)
+        else:
+            self.shared.delete("answer_bank_lock", bank.ctx_key)
+
+    async def start_build(self, ctx_key: str, model, resume: str, jd: str, company: str):
+        """Schedule a background build unless one already exists for this context."""
+        bank = await self.lookup(ctx_key)
+        if bank and bank.state != "failed":
+            return bank
+        # First worker to take the lock builds; the rest follow via shared state
+        if self.shared is not None:
+            claimed = await asyncio.to_thread(
+                self.shared.set_if_absent, "answer_bank_lock", ctx_key, WORKER_ID, BUILD_LOCK_TTL_SECONDS
+            )
+            if not claimed:
+                return await self.lookup(ctx_key)
+
+        bank = AnswerBank(ctx_key)
+        self._store(bank)
+        task = asyncio.create_task(self._build(bank, model, resume, jd, company))
+        self._tasks[ctx_key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(ctx_key, None))
+        return bank
+
+    async def _build(self, bank: AnswerBank, model, resume: str, jd: str, company: str):
+        bank.state = "building"
+        bank.started_at = time.time()
+        await asyncio.to_thread(self._publish, bank)
+        index = await asyncio.to_thread(context_index.ContextIndex, resume, jd)
+
+        async def run_batch(name, desc):
+            resume_text, resume_omitted = index.pack("resume", RESUME_TOKEN_BUDGET, query=f"{desc} {jd}")
+            jd_text, jd_omitted = index.pack("jd", JD_TOKEN_BUDGET, query=f"{desc} {resume}")
+            if resume_omitted or jd_omitted:
+                logger.info(f"Answer bank batch '{name}': {resume_omitted} resume / {jd_omitted} JD sections omitted")
+            prompt = build_batch_prompt(desc, resume_text, jd_text, company)
+            try:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self._executor, model.generate_content, prompt)
+                items = _parse_json(response.text).get("items", [])
+                bank.add_items(items)
+            except Exception as e:
+                logger.error(f"Answer bank batch '{name}' failed: {e}")
+                return False
+            with bank._lock:
+                bank.categories_done.append(name)
+            await asyncio.to_thread(self._publish, bank, name, items)
+            return True
+
+        results = await asyncio.gather(*(run_batch(name, desc) for name, desc in CATEGORIES))
+        bank.finished_at = time.time()
+        if any(results):
+            bank.state = "ready"
+        else:
+            bank.state = "failed"
+            bank.error = "All batches failed"
+        await asyncio.to_thread(self._publish, bank)
+        logger.info(f"Answer bank built: {bank.status()}")
@@ -0,0 +1,293 @@
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Config
+EMBED_DIM = 2048               # Hashed n-gram buckets per vector
+SIMILARITY_THRESHOLD = 0.82    # Cosine similarity needed to count as "same question"
+MIN_TERM_OVERLAP = 0.6         # ...and Jaccard overlap of content words, so "failed"/"succeeded" differ
+MAX_ENTRIES_PER_CONTEXT = 64   # LRU cap per resume/JD pair
+MAX_CONTEXTS = 256             # LRU cap on distinct resume/JD pairs held in memory
+
+
+def context_key(resume: str, jd: str, company: str = "") -> str:
+    """Stable key for a session's resume + JD context."""
+    h = hashlib.sha256()
+    for part in (resume or "", jd or "", company or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def normalize_question(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+STOPWORDS = frozenset("""
+    a about all also am an and any are as at be been but by can could did do does
+    doing for from give had has have how i if in into is it its just let like me
+    more my now of on or our please share should so some talk tell than that the
+    their them then there these they this those through to us walk was we were what
+    when where which who why will with would you your describe explain
+    little bit briefly quickly maybe say um uh okay ok well actually basically
+""".split())
+
+# Spoken filler that changes the wording but not the question; dropped before embedding
+FILLER_PATTERN = re.compile(
+    r"\b(a little bit|a bit|a little|would you say|briefly|quickly|maybe|just|please|"
+    r"um|uh|okay|ok|well|actually|basically|so)\b"
+)
+
+# Questions that only make sense given the previous turns ("can you elaborate?")
+FOLLOWUP_PATTERN = re.compile(
+    r"\b(tell me more|elaborate|expand on|go on|go deeper|dig deeper|more detail|"
+    r"you (just )?(said|mentioned)|earlier|previous|last (one|question|answer|point)|"
+    r"that one|why is that|how so|what about|what else|anything else|for example|an example|clarify)\b"
+)
+ANAPHORA = frozenset(["that", "this", "it", "those", "these", "them", "there", "they"])
+
+
+# Interview wording that varies between the asked question and an LLM-written one
+SYNONYMS = {
+    "biggest": "greatest", "main": "greatest", "role": "job", "position": "job",
+    "join": "work", "background": "resume", "cv": "resume", "career": "resume",
+}
+
+
+def _stem(word: str) -> str:
+    word = SYNONYMS.get(word, word)
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    # "leave"/"leaving", "challenge"/"challenging" end up the same
+    return word[:-1] if len(word) > 4 and word.endswith("e") else word
+
+
+def content_terms(text: str) -> frozenset:
+    """Stemmed non-stopwords; the words that decide what a question is about."""
+    return frozenset(_stem(w) for w in normalize_question(text).split() if len(w) > 1 and w not in STOPWORDS)
+
+
+def term_overlap(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def term_containment(asked: frozenset, stored: frozenset) -> float:
+    """Share of the asked question's terms found in the stored one."""
+    if not asked:
+        return 1.0
+    return len(asked & stored) / len(asked)
+
+
+def is_followup(text: str) -> bool:
+    """True if the question leans on conversation history, so its answer can't be reused."""
+    norm = normalize_question(text)
+    if FOLLOWUP_PATTERN.search(norm):
+        return True
+    terms = content_terms(norm)
+    # "why?" has nothing of its own to match on; "hardest part of it" points back
+    return len(terms) == 0 or (len(terms) <= 2 and norm.split()[-1] in ANAPHORA)
+
+
+def strip_filler(norm: str) -> str:
+    return re.sub(r"\s+", " ", FILLER_PATTERN.sub(" ", norm)).strip()
+
+
+def _bucket(token: str) -> int:
+    # crc32 instead of hash() so vectors are identical across processes
+    return zlib.crc32(token.encode("utf-8")) % EMBED_DIM
+
+
+def embed(text: str) -> np.ndarray:
+    """L2-normalised bag of hashed word unigrams/bigrams and char trigrams."""
+    vec = np.zeros(EMBED_DIM, dtype=np.float32)
+    norm = strip_filler(normalize_question(text))
+    if not norm:
+        return vec
+
+    words = norm.split()
+    for w in words:
+        vec[_bucket("w:" + w)] += 1.0
+    for a, b in zip(words, words[1:]):
+        vec[_bucket("b:" + a + " " + b)] += 1.0
+
+    padded = f" {norm} "
+    for i in range(len(padded) - 2):
+        vec[_bucket("c:" + padded[i:i + 3])] += 0.5
+
+    length = np.linalg.norm(vec)
+    if length > 0:
+        vec /= length
+    return vec
+
+
+class SimilarityIndex:
+    """Fixed-capacity vector index with LRU eviction.
+
+    Rows live in one preallocated matrix so a lookup is a single mat-vec product.
+    Rows added with `terms` only match queries whose content words overlap
+    enough (Jaccard >= MIN_TERM_OVERLAP by default), since the hashed vectors
+    alone can't tell "failed" from "succeeded". Not thread-safe on its own; callers hold a lock.
+    """
+
+    def __init__(self, capacity: int = MAX_ENTRIES_PER_CONTEXT, dim: int = EMBED_DIM):
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.keys = [None] * capacity
+        self.values = [None] * capacity
+        self.terms = [None] * capacity
+        self.size = 0
+        self._tick = 0
+
+    def _touch(self, idx: int):
+        self._tick += 1
+        self.last_used[idx] = self._tick
+
+    def search(self, vec: np.ndarray, threshold: float = SIMILARITY_THRESHOLD, terms: frozenset = None,
+               overlap=term_overlap, min_overlap: float = MIN_TERM_OVERLAP):
+        """Return (value, score) of the best row above threshold, else None.
+
+        `overlap(query_terms, row_terms)` must reach `min_overlap` as well.
+        """
+        if self.size == 0 or not vec.any():
+            return None
+        scores = self.vectors[:self.size] @ vec
+        candidates = np.flatnonzero(scores >= threshold)
+        for idx in candidates[np.argsort(-scores[candidates])]:
+            idx = int(idx)
+            row_terms = self.terms[idx]
+            if terms is not None and row_terms is not None and overlap(terms, row_terms) < min_overlap:
+                continue
+            self._touch(idx)
+            return self.values[idx], float(scores[idx])
+        return None
+
+    def add(self, key: str, vec: np.ndarray, value, terms: frozenset = None):
+        # Overwrite an existing row for the same normalised key
+        for idx in range(self.size):
+            if self.keys[idx] == key:
+                break
+        else:
+            if self.size < self.capacity:
+                idx = self.size
+                self.size += 1
+            else:
+                idx = int(np.argmin(self.last_used[:self.size]))
+
+        self.vectors[idx] = vec
+        self.keys[idx] = key
+        self.values[idx] = value
+        self.terms[idx] = terms
+        self._touch(idx)
+
+    def __len__(self):
+        return self.size
+
+
+class AnswerCache:
+    """Cross-session cache of answers keyed by (context hash, question).
+
+    Follow-ups ("tell me more about that") depend on the conversation, not just
+    the context, so they are never stored or served.
+    """
+
+    def __init__(self, max_contexts: int = MAX_CONTEXTS,
+                 max_entries: int = MAX_ENTRIES_PER_CONTEXT,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.max_contexts = max_contexts
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ctx_key: str, question: str):
+        if is_followup(question):
+            return None
+        vec = embed(question)
+        terms = content_terms(question)
+        with self._lock:
+            index = self._contexts.get(ctx_key)
+            if index is None:
+                return None
+            self._contexts.move_to_end(ctx_key)
+            hit = index.search(vec, self.threshold, terms)
+        return hit[0] if hit else None
+
+    def put(self, ctx_key: str, question: str, answer: str):
+        key = normalize_question(question)
+        if not key or is_followup(question):
+            return
+        vec = embed(question)
+        with self._lock:
+            index = self._contexts.get(ctx_key)
+            if index is None:
+                index = SimilarityIndex(self.max_entries)
+                self._contexts[ctx_key] = index
+                while len(self._contexts) > self.max_contexts:
+                    self._contexts.popitem(last=False)
+            self._contexts.move_to_end(ctx_key)
+            index.add(key, vec, answer, content_terms(question))
+
+
+class SessionCacheStats:
+    """Per-session hit rate and latency saved."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def record_miss(self, elapsed: float):
+        self.misses += 1
+        self.miss_seconds += elapsed
+        _GLOBAL_LATENCY.observe(elapsed)
+
+    def record_hit(self):
+        self.hits += 1
+        # Estimate what the LLM would have cost from this session's own misses
+        self.saved_seconds += _GLOBAL_LATENCY.estimate(self.avg_miss_seconds)
+
+    @property
+    def avg_miss_seconds(self):
+        return self.miss_seconds / self.misses if self.misses else 0.0
+
+    def to_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "latency_saved_ms": int(self.saved_seconds * 1000),
+        }
+
+
+class _LatencyEstimate:
+    """EMA of LLM latency across all sessions, used before a session has misses."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed: float):
+        with self._lock:
+            self.value = elapsed if self.value == 0.0 else (
+                self.alpha * elapsed + (1 - self.alpha) * self.value)
+
+    def estimate(self, session_avg: float) -> float:
+        return session_avg or self.value
+
+
+_GLOBAL_LATENCY = _LatencyEstimate()
+
@@ -8,6 +8,7 @@ import re
 import smtplib
 import random
 import string
+import time
 import bcrypt
 from datetime import datetime, timedelta
 from email.mime.text import MIMEText
@@ -65,16 +66,37 @@ except Exception as e:
     credentials = None
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, Depends, HTTPException, status
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from pypdf import PdfReader
 import io
 import models
-from database import engine, get_db
+from database import engine, get_db, SessionLocal
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from auth import get_password_hash, verify_password, create_access_token, verify_google_token, get_current_user
+from auth import get_password_hash, verify_password, create_access_token, verify_google_token, get_current_user, get_admin_user, decode_token_subject
 from datetime import timedelta
+import answer_cache
+import answer_bank
+import context_index
+import llm_router
+import admission
+import transcript_store
+import diagnostics
+import sessions
+import drain
+import signal
+import shared_state
+
+
+# LLM Router (per question-type model + hedged requests)
+if os.getenv("LLM_FAKE", "false").lower() == "true":
+    LLM_ROUTER = llm_router.LLMRouter(llm_router.FakeModel)
+elif model:
+    LLM_ROUTER = llm_router.LLMRouter(GenerativeModel)
+else:
+    LLM_ROUTER = None
 
 
 # Initialize Tables
@@ -117,6 +139,24 @@ ensure_schema_updates()
 
 app = FastAPI()
 
+# Session transcripts/answers, persisted in batches off the request path
+TRANSCRIPTS = transcript_store.TranscriptStore(SessionLocal)
+
+@app.on_event("startup")
+def start_transcript_store():
+    TRANSCRIPTS.start()
+
+# Event-loop lag monitor (records the stack of whatever blocks the loop)
+LOOP_MONITOR = diagnostics.LoopLagMonitor()
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    LOOP_MONITOR.start()
+
+@app.on_event("shutdown")
+def stop_loop_monitor():
+    LOOP_MONITOR.stop()
+
 
 # --- Auth Schemas ---
 class UserLogin(BaseModel):
@@ -350,12 +390,104 @@ def heartbeat(current_user: models.User = Depends(get_current_user), db: Session
     return {"status": "success", "remaining_seconds": max(0, current_user.time_limit_seconds - current_user.time_used_seconds)}
 
 
-# Context Management
-USER_CONTEXT = {
+# --- Admin Diagnostics ---
+@app.get("/api/admin/loop-lag")
+def get_loop_lag(admin: models.User = Depends(get_admin_user)):
+    return LOOP_MONITOR.snapshot()
+
+@app.get("/api/admin/profile", response_class=PlainTextResponse)
+async def profile(seconds: float = 10, admin: models.User = Depends(get_admin_user)):
+    # Samples every thread (incl. speech threads); collapsed stacks for flamegraph.pl / speedscope
+    return await asyncio.to_thread(diagnostics.sample_stacks, seconds)
+
+# --- Interview Review API ---
+@app.get("/api/sessions")
+def list_sessions(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    E = models.SessionEvent
+    rows = (
+        db.query(E.session_id, func.min(E.created_at), func.max(E.created_at), func.count(E.id))
+        .filter(E.user_id == current_user.id)
+        .group_by(E.session_id)
+        .order_by(func.min(E.created_at).desc())
+        .limit(50)
+        .all()
+    )
+    return {"sessions": [
+        {"session_id": sid, "started_at": start.isoformat(), "last_event_at": last.isoformat(), "events": count}
+        for sid, start, last, count in rows
+    ]}
+
+@app.get("/api/sessions/{session_id}")
+def get_session(session_id: str, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    E = models.SessionEvent
+    events = (
+        db.query(E)
+        .filter(E.user_id == current_user.id, E.session_id == session_id)
+        .order_by(E.seq)
+        .all()
+    )
+    if not events:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "events": [
+        {"seq": e.seq, "kind": e.kind, "at": e.created_at.isoformat(), "question": e.question, "text": e.text}
+        for e in events
+    ]}
+
+
+# Shared state across uvicorn workers (SHARED_STATE_BACKEND=memory|sqlite)
+SHARED = shared_state.create_backend()
+
+# Context Management (shared so /update_context and /ws can land on different workers)
+USER_CONTEXT = shared_state.SharedDict(SHARED, "user_context", {
     "resume": "",
     "jd": "",
     "company": ""
-}
+})
+
+# Precomputed likely-question answers, built on /update_context
+ANSWER_BANKS = answer_bank.AnswerBankRegistry(shared=SHARED)
+ANSWER_BANK_REFINE = os.getenv("ANSWER_BANK_REFINE", "true").lower() == "true"
+
+# Retrieval over resume/JD sections instead of pasting whole documents
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "1200"))
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+_CONTEXT_INDEX = {"key": None, "index": None}
+
+async def read_context():
+    """Snapshot of USER_CONTEXT, read once per request.
+
+    With the SQLite backend each read is a query that can wait on other workers'
+    locks, so it runs in a thread rather than on the event loop.
+    """
+    return await asyncio.to_thread(USER_CONTEXT.snapshot)
+
+_USAGE_WRITES = set()
+
+def count_usage(name):
+    # Fire-and-forget off the loop; usage counters must never delay an answer
+    task = asyncio.ensure_future(asyncio.to_thread(SHARED.incr, "usage", name))
+    _USAGE_WRITES.add(task)
+    task.add_done_callback(_USAGE_WRITES.discard)
+
+async def get_context_index(ctx):
+    """Index for a USER_CONTEXT snapshot, rebuilt (off the loop) only when the documents change."""
+    key = answer_cache.context_key(ctx["resume"], ctx["jd"])
+    if _CONTEXT_INDEX["key"] != key:
+        index = await asyncio.to_thread(context_index.ContextIndex, ctx["resume"], ctx["jd"])
+        _CONTEXT_INDEX.update(index=index, key=key)
+    return _CONTEXT_INDEX["index"]
+
+def pack_for_analysis(resume_text, job_description):
+    """Resume and JD fitted to the analysis budget; CPU-bound, so callers run it in a thread."""
+    index = context_index.ContextIndex(resume_text, job_description)
+    jd_text, jd_omitted = index.pack("jd", 1500, query=resume_text)
+    resume_text, resume_omitted = index.pack("resume", 2500, query=job_description)
+    return resume_text, resume_omitted, jd_text, jd_omitted
+
+def extract_pdf_text(content):
+    # CPU-bound; callers run it in a thread so it doesn't stall the event loop
+    reader = PdfReader(io.BytesIO(content))
+    return "".join((page.extract_text() or "") + "\n" for page in reader.pages)
 
 @app.post("/update_context")
 async def update_context(
@@ -363,37 +495,59 @@ async def update_context(
     jd: str = Form(...),
     company: str = Form("")
 ):
+    ctx = await read_context()
+    updates = {"jd": jd, "company": company}
+
     # Process PDF Resume if provided
     if resume_file:
         try:
             content = await resume_file.read()
-            pdf = PdfReader(io.BytesIO(content))
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
+            text = await asyncio.to_thread(extract_pdf_text, content)
             
-            USER_CONTEXT["resume"] = text
+            updates["resume"] = text
             logger.info(f"Resume PDF processed ({len(text)} chars)")
         except Exception as e:
             logger.error(f"Error reading PDF: {e}")
             return {"status": "error", "message": str(e)}
             
-    USER_CONTEXT["jd"] = jd
-    USER_CONTEXT["company"] = company
+    ctx.update(updates)
+    await asyncio.to_thread(USER_CONTEXT.update, updates)
+    await asyncio.to_thread(SHARED.incr, "usage", "context_updates")
     logger.info(f"Context updated via API for company: {company}")
+    await get_context_index(ctx)
+
+    # Use the idle time before the interview to precompute likely answers
+    if model and ctx["resume"] and ctx["jd"]:
+        ctx_key = answer_cache.context_key(ctx["resume"], ctx["jd"], ctx["company"])
+        await ANSWER_BANKS.start_build(ctx_key, model, ctx["resume"], ctx["jd"], ctx["company"])
     return {"status": "success", "message": "Context updated"}
 
+@app.get("/api/answer-bank/status")
+async def answer_bank_status():
+    ctx = await read_context()
+    bank = await ANSWER_BANKS.lookup(answer_cache.context_key(ctx["resume"], ctx["jd"], ctx["company"]))
+    if not bank:
+        return {"state": "none"}
+    return bank.status()
+
 @app.post("/api/generate-briefing")
 async def generate_briefing():
     try:
-        if not USER_CONTEXT["resume"] or not USER_CONTEXT["jd"]:
+        ctx = await read_context()
+        if not ctx["resume"] or not ctx["jd"]:
             return {"status": "error", "message": "Resume and JD required"}
 
+        index = await get_context_index(ctx)
+        resume_text, resume_omitted = await asyncio.to_thread(index.pack, "resume", 1500, query=ctx["jd"])
+        jd_text, jd_omitted = await asyncio.to_thread(index.pack, "jd", 1000, query=ctx["resume"])
+        if resume_omitted or jd_omitted:
+            logger.warning(f"Briefing context trimmed: {resume_omitted} resume / {jd_omitted} JD sections omitted")
+
         prompt = f"""
         You are a career coach. Based on this RESUME and JOB DESCRIPTION, generate 4 "Prep Cards" to help the candidate in the final 5 minutes before the interview.
         
-        RESUME: {USER_CONTEXT['resume'][:3000]}
-        JD: {USER_CONTEXT['jd'][:2000]}
+        RESUME: {resume_text}
+        JD: {jd_text}
 
         OUTPUT FORMAT (JSON ONLY):
         {{
@@ -425,7 +579,9 @@ async def generate_briefing():
         text = response.text.strip()
         if "```json" in text:
             text = text.split("```json")[1].split("```")[0]
-        return json.loads(text)
+        result = json.loads(text)
+        result["omitted_sections"] = resume_omitted + jd_omitted
+        return result
     except Exception as e:
         logger.error(f"Briefing failed: {e}")
         return {"status": "error", "message": str(e)}
@@ -438,10 +594,13 @@ async def analyze_resume(
     try:
         # 1. Extract Text from PDF
         content = await resume.read()
-        reader = PdfReader(io.BytesIO(content))
-        resume_text = ""
-        for page in reader.pages:
-            resume_text += page.extract_text() or ""
+        resume_text = await asyncio.to_thread(extract_pdf_text, content)
+
+        # Fit to budget by relevance to the JD rather than cutting at a fixed offset
+        resume_text, resume_omitted, jd_text, jd_omitted = await asyncio.to_thread(
+            pack_for_analysis, resume_text, job_description)
+        if resume_omitted or jd_omitted:
+            logger.warning(f"Resume analysis trimmed: {resume_omitted} resume / {jd_omitted} JD sections omitted")
             
         # 2. Construct Prompt
         prompt = f"""
@@ -451,10 +610,10 @@ async def analyze_resume(
         Analyze the following Resume against the Job Description (JD).
         
         RESUME:
-        {resume_text[:4000]}
+        {resume_text}
         
         JOB DESCRIPTION:
-        {job_description[:2000]}
+        {jd_text}
         
         Your task:
         1. Compare every requirement in the JD with the experience in the Resume.
@@ -477,7 +636,7 @@ async def analyze_resume(
              raise HTTPException(status_code=500, detail="AI Model not initialized")
 
         # 3. Generate Response
-        response = model.generate_content(prompt)
+        response = await asyncio.to_thread(model.generate_content, prompt)
         response_text = response.text.strip()
         
         # Clean potential markdown
@@ -486,7 +645,9 @@ async def analyze_resume(
         if response_text.endswith("```"):
             response_text = response_text[:-3]
             
-        return json.loads(response_text)
+        result = json.loads(response_text)
+        result["omitted_sections"] = resume_omitted + jd_omitted
+        return result
         
     except Exception as e:
         logger.error(f"Resume Analysis Failed: {e}")
@@ -503,26 +664,38 @@ async def get():
             return HTMLResponse(content=f.read())
     return HTMLResponse(content="<h1>Error: templates/index.html not found</h1>")
 
-async def get_vertex_response(text, history):
-    if not model:
+@app.get("/api/llm/stats")
+async def llm_stats():
+    if not LLM_ROUTER:
+        return {"status": "error", "message": "LLM router not initialized"}
+    return LLM_ROUTER.snapshot()
+
+async def get_vertex_response(text, history, ctx):
+    if not LLM_ROUTER:
         return "Error: Vertex AI not initialized."
     try:
         # Format history
         history_text = ""
         if history:
             history_text = "PREVIOUS CONVERSATION:\n" + "\n".join([f"Interviewer: {q}\nYou: {a}" for q, a in history[-10:]])
+
+        # Only the sections relevant to this question (plus the resume header for name/contact)
+        index = await get_context_index(ctx)
+        query = text + (" " + history[-1][0] if history else "")
+        resume_chunks = index.retrieve("resume", query, RETRIEVAL_TOKEN_BUDGET * 2 // 3, top_k=RETRIEVAL_TOP_K, pinned=(0,))
+        jd_chunks = index.retrieve("jd", query, RETRIEVAL_TOKEN_BUDGET // 3, top_k=RETRIEVAL_TOP_K // 2)
         
         # Smart Prompt with Resume & JD
         prompt = f"""
-        You are the candidate in a job interview for {USER_CONTEXT['company']}.
+        You are the candidate in a job interview for {ctx['company']}.
         Identify yourself using the name and details provided in YOUR RESUME below.
         You are listening to the INTERVIEWER.
         
-        YOUR RESUME (The "Truth"):
-        {USER_CONTEXT['resume']}
+        YOUR RESUME (The "Truth", relevant sections):
+        {context_index.render(resume_chunks)}
         
-        JOB DESCRIPTION (Target Role):
-        {USER_CONTEXT['jd']}
+        JOB DESCRIPTION (Target Role, relevant sections):
+        {context_index.render(jd_chunks)}
         
         {history_text}
         
@@ -544,12 +717,49 @@ async def get_vertex_response(text, history):
            - Complexity.
         """
         
-        response = await asyncio.to_thread(model.generate_content, prompt)
+        route = llm_router.classify_question(text)
+        async with ADMISSION.llm_call():
+            response = await LLM_ROUTER.generate(prompt, route=route)
         return response.text.strip()
+    except llm_router.LatencyBudgetExceeded as e:
+        logger.error(f"Vertex AI timeout: {e}")
+        return "Error: answer took too long, please ask again."
     except Exception as e:
         logger.error(f"Vertex AI Error: {e}")
         return "Error generating answer from Vertex AI."
 
+# Answer Cache (shared across sessions with the same resume/JD)
+ANSWER_CACHE = answer_cache.AnswerCache()
+ANSWER_CACHE_REFRESH = os.getenv("ANSWER_CACHE_REFRESH", "false").lower() == "true"
+
+def is_cacheable_answer(answer):
+    return bool(answer) and answer != "NO_ANSWER" and not answer.startswith("Error")
+
+_CACHE_REFRESHES = set()
+
+async def refresh_cached_answer(ctx_key, text, history, ctx):
+    # Regenerate in the background so the next hit gets a fresher answer
+    answer = await get_vertex_response(text, history, ctx)
+    if is_cacheable_answer(answer):
+        ANSWER_CACHE.put(ctx_key, text, answer)
+
+# Admission Control (caps live sessions so a spike can't degrade existing ones)
+ADMISSION = admission.AdmissionController()
+
+@app.get("/api/load")
+async def get_load():
+    # For load balancer health checks: 503 tells it to route new sessions elsewhere
+    snapshot = {"worker": shared_state.WORKER_ID, **ADMISSION.snapshot()}
+    return JSONResponse(content=snapshot, status_code=200 if snapshot["accepting"] else 503)
+
+@app.get("/api/cluster/stats")
+async def cluster_stats():
+    owners, usage = await asyncio.to_thread(lambda: (SHARED.items("sessions"), SHARED.items("usage")))
+    per_worker = {}
+    for owner in owners.values():
+        per_worker[owner["worker"]] = per_worker.get(owner["worker"], 0) + 1
+    return {"worker": shared_state.WORKER_ID, "live_sessions": len(owners), "sessions_per_worker": per_worker, "usage": usage}
+
 def should_trigger_ai(text):
     # Relaxed filter: Let the AI decide, but filter out absolute noise
     text = text.strip()
@@ -557,15 +767,119 @@ def should_trigger_ai(text):
         return False
     return True
 
+SESSION_OWNER_TTL = 6 * 3600 # Ownership records outlive any interview; cleans up after crashes
+
+# Live sessions survive network blips for RESUME_GRACE_SECONDS under a resume token
+LIVE_SESSIONS = sessions.SessionRegistry()
+
+@app.on_event("shutdown")
+async def close_sessions_and_flush():
+    # Sessions first, so their in-flight answers and `end` events land in the buffer we flush
+    await asyncio.gather(*(LIVE_SESSIONS.close(live) for live in LIVE_SESSIONS.all()), return_exceptions=True)
+    await asyncio.to_thread(TRANSCRIPTS.stop)
+
+# Drain mode for deploys (SIGUSR1 or POST /api/admin/drain)
+DRAIN = drain.DrainController(ADMISSION, LIVE_SESSIONS, TRANSCRIPTS)
+
+@app.on_event("startup")
+async def install_drain_signal():
+    if not hasattr(signal, "SIGUSR1"):  # Not available on Windows
+        return
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, DRAIN.begin)
+    except RuntimeError as e:
+        # Loop isn't in the main thread (e.g. under a test client)
+        logger.warning(f"SIGUSR1 drain handler not installed: {e}")
+
+@app.post("/api/admin/drain")
+async def start_drain(deadline_seconds: float = drain.DRAIN_DEADLINE_SECONDS, admin: models.User = Depends(get_admin_user)):
+    started = DRAIN.begin(deadline_seconds)
+    return {"started": started, **DRAIN.status()}
+
+@app.get("/api/admin/drain")
+async def drain_status(admin: models.User = Depends(get_admin_user)):
+    return DRAIN.status()
+
+async def expire_session(live):
+    logger.info(f"Resume window expired for {live.email}")
+    await LIVE_SESSIONS.close(live)
+
+async def receive_audio(websocket, live):
+    """Pump audio into the session until the socket closes.
+
+    Returns True if the client ended the session on purpose, False on a drop.
+    """
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return message.get("code") in (1000, 1001)
+            if message.get("bytes"):
+                live.audio_queue.put(message["bytes"])
+            elif message.get("text"):
+                if json.loads(message["text"]).get("type") == "stop":
+                    return True
+    except WebSocketDisconnect as e:
+        return e.code in (1000, 1001)
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        return False
+
+async def wait_for_client_exit(websocket):
+    """Return once a client that is still queued for admission goes away.
+
+    Audio sent before the session starts is dropped.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("text") and json.loads(message["text"]).get("type") == "stop":
+            return
+
+async def run_connection(websocket, live):
+    clean = await receive_audio(websocket, live)
+    if clean:
+        logger.info("Client disconnected")
+        await LIVE_SESSIONS.close(live)
+    else:
+        logger.info(f"Connection dropped for {live.email}, holding session for resume")
+        live.detach(websocket, expire_session)
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, token: str = None, resume: str = None, last_seq: int = 0, db: Session = Depends(get_db)):
     # Authenticate user via token query param
     if not token:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
+
+    # Fast path: reattach to a session still inside its resume window (no DB, no new stream)
+    if resume:
+        live = LIVE_SESSIONS.get(resume)
+        if live and live.email == decode_token_subject(token):
+            if live.credit_check_due():
+                # Same is_active/credit checks as a new session, at most once per CREDIT_RECHECK_SECONDS
+                try:
+                    user = await asyncio.to_thread(get_current_user, token, db)
+                    live.set_credit(user.time_limit_seconds, user.time_used_seconds)
+                except Exception:
+                    live.set_credit(0, 0)
+            if not live.has_credit():
+                logger.info(f"Resume refused for {live.email}: inactive or out of credit")
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                await LIVE_SESSIONS.close(live)
+                return
+            await websocket.accept()
+            await live.attach(websocket, last_seq)
+            logger.info(f"Client resumed session: {live.email}")
+            await run_connection(websocket, live)
+            return
+        owner = await asyncio.to_thread(SHARED.get, "sessions", resume)
+        if owner and owner["worker"] != shared_state.WORKER_ID:
+            logger.info(f"Session {owner['session_id']} lives on worker {owner['worker']}; starting a fresh one here")
         
     try:
-        user = get_current_user(token, db)
+        user = await asyncio.to_thread(get_current_user, token, db)
     except Exception:
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
@@ -575,12 +889,54 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Sessio
         return
 
     await websocket.accept()
+
+    async def notify_queued(position):
+        await websocket.send_text(json.dumps({"type": "queued", "position": position}))
+
+    # Race the queue against the client leaving, so a tab closed while queued gives up its spot
+    acquire_task = asyncio.ensure_future(ADMISSION.acquire(on_queued=notify_queued))
+    exit_task = asyncio.ensure_future(wait_for_client_exit(websocket))
+    await asyncio.wait({acquire_task, exit_task}, return_when=asyncio.FIRST_COMPLETED)
+    if exit_task.done():
+        acquire_task.cancel()
+        try:
+            await acquire_task
+            ADMISSION.release()  # Granted in the same instant the client left
+        except (asyncio.CancelledError, admission.AdmissionRejected):
+            pass
+        logger.info(f"{user.email} left while waiting for capacity")
+        return
+    exit_task.cancel()
+    try:
+        await exit_task
+    except asyncio.CancelledError:
+        pass
+
+    try:
+        acquire_task.result()
+    except admission.AdmissionRejected as e:
+        logger.warning(f"Rejected session for {user.email}: {e.reason}")
+        if ADMISSION.draining:
+            await websocket.send_text(json.dumps({"type": "reconnect", "delay_ms": e.retry_after * 1000, "reason": e.reason}))
+            await websocket.close(code=drain.WS_SERVICE_RESTART)
+            return
+        await websocket.send_text(json.dumps({"type": "rejected", "reason": e.reason, "retry_after": e.retry_after}))
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=f"retry-after={e.retry_after}")
+        return
+    except Exception:
+        logger.info("Client left while waiting for capacity")
+        return
+
     logger.info(f"Client connected: {user.email}")
     
-    audio_queue = queue.Queue()
-    conversation_history = []
-    loop = asyncio.get_running_loop()
-    stop_event = threading.Event()
+    user_id, user_email = user.id, user.email
+    session_id = TRANSCRIPTS.begin_session(user_id, (await read_context())["company"])
+    live = sessions.LiveSession(user_id, user_email, session_id)
+    live.set_credit(user.time_limit_seconds, user.time_used_seconds)
+    audio_queue = live.audio_queue
+    conversation_history = live.conversation_history
+    stop_event = live.stop_event
+    cache_stats = answer_cache.SessionCacheStats()
 
     def request_generator():
         while not stop_event.is_set():
@@ -594,10 +950,14 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Sessio
                 continue
                 
     def speech_recognition_thread():
+        # One client per session; only the stream is re-opened on errors/limits
+        client = None
         # Keep reconnecting until stopped
         while not stop_event.is_set():
+            stream_open = False
             try:
-                client = speech.SpeechClient(credentials=credentials)
+                if client is None:
+                    client = speech.SpeechClient(credentials=credentials)
                 config = speech.RecognitionConfig(
                     encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
                     sample_rate_hertz=RATE,
@@ -613,6 +973,8 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Sessio
                 
                 # This blocks until stream ends (limit or error)
                 responses = client.streaming_recognize(streaming_config, requests)
+                live.loop.call_soon_threadsafe(ADMISSION.speech_started)
+                stream_open = True
                 
                 for response in responses:
                     if stop_event.is_set():
@@ -628,22 +990,18 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Sessio
                     transcript = result.alternatives[0].transcript
                     is_final = result.is_final
                     
-                    message = {
+                    live.send_threadsafe({
                         "type": "transcript",
                         "transcript": transcript,
                         "is_final": is_final
-                    }
-                    
-                    if not stop_event.is_set():
-                        asyncio.run_coroutine_threadsafe(
-                            websocket.send_text(json.dumps(message)), loop
-                        )
+                    })
+
+                    if is_final:
+                        TRANSCRIPTS.record(user_id, session_id, "transcript", text=transcript)
 
                     # TRIGGER AI LOGIC - "AI Decides" Strategy
                     if is_final and should_trigger_ai(transcript):
-                        asyncio.run_coroutine_threadsafe(
-                            trigger_ai_response(transcript, websocket), loop
-                        )
+                        live.spawn_threadsafe(trigger_ai_response, transcript)
                         
             except Exception as e:
                 # Log but don't crash, retry loop will catch unless stopped
@@ -651,47 +1009,103 @@ async def websocket_endpoint(websocket: WebSocket, token: str = None, db: Sessio
                      logger.error(f"Speech API Error (will retry): {e}")
                 else:
                      logger.error(f"Speech thread error: {e}")
+
+            if stream_open:
+                # Admission counts open streams, not sessions; a session between re-opens holds none
+                live.loop.call_soon_threadsafe(ADMISSION.speech_stopped)
                 
             if not stop_event.is_set():
                  logger.info("Restarting speech stream...")
             
-    async def trigger_ai_response(text, ws):
+    def remember(question, answer):
+        conversation_history.append((question, answer))
+        TRANSCRIPTS.record(user_id, session_id, "answer", text=answer, question=question)
+
+    async def trigger_ai_response(text):
         # Notify UI we are thinking (optional, maybe too noisy if we do it for everything?)
         # Let's send a subtle status
-        await ws.send_text(json.dumps({"type": "status", "message": "Listening..."}))
+        await live.send({"type": "status", "message": "Listening..."})
         
-        answer = await get_vertex_response(text, conversation_history)
+        ctx = await read_context()
+        ctx_key = answer_cache.context_key(ctx["resume"], ctx["jd"], ctx["company"])
+        answer = ANSWER_CACHE.get(ctx_key, text)
+        cached = answer is not None
+        if cached:
+            cache_stats.record_hit()
+            count_usage("cache_hits")
+            if ANSWER_CACHE_REFRESH:
+                task = asyncio.create_task(refresh_cached_answer(ctx_key, text, list(conversation_history), ctx))
+                _CACHE_REFRESHES.add(task)
+                task.add_done_callback(_CACHE_REFRESHES.discard)
+        else:
+            bank = await ANSWER_BANKS.lookup(ctx_key)
+            banked = bank.match(text) if bank else None
+            if banked:
+                count_usage("bank_hits")
+                # Serve the precomputed answer now, refine with a fresh generation after
+                await live.send({
+                    "type": "answer",
+                    "question": text,
+                    "answer": banked["answer"],
+                    "precomputed": True
+                })
+                if not ANSWER_BANK_REFINE:
+                    remember(text, banked["answer"])
+                    return
+
+            started = time.perf_counter()
+            answer = await get_vertex_response(text, conversation_history, ctx)
+            count_usage("llm_answers")
+            cache_stats.record_miss(time.perf_counter() - started)
+            if is_cacheable_answer(answer):
+                ANSWER_CACHE.put(ctx_key, text, answer)
+
+            if banked:
+                answer = answer if is_cacheable_answer(answer) else banked["answer"]
+                remember(text, answer)
+                await live.send({
+                    "type": "answer_refined",
+                    "question": text,
+                    "answer": answer
+                })
+                return
         
         if answer == "NO_ANSWER":
             # AI decided this wasn't worth answering
             logger.info(f"AI declined to answer: '{text}'")
-            await ws.send_text(json.dumps({"type": "status", "message": "Ready"}))
+            await live.send({"type": "status", "message": "Ready"})
             return
 
         # Update History
-        conversation_history.append((text, answer))
+        remember(text, answer)
         
-        await ws.send_text(json.dumps({
+        await live.send({
             "type": "answer",
             "question": text,
-            "answer": answer
-        }))
+            "answer": answer,
+            "cached": cached
+        })
+        await live.send({"type": "cache_stats", **cache_stats.to_dict()})
 
-    t = threading.Thread(target=speech_recognition_thread)
-    t.start()
-    
-    try:
-        while True:
-            message = await websocket.receive()
-            if "bytes" in message:
-                audio_queue.put(message["bytes"])
-            elif "text" in message:
-                pass
-    except WebSocketDisconnect:
-        logger.info("Client disconnected")
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-    finally:
+    t = threading.Thread(target=speech_recognition_thread, name=f"speech-{session_id[:8]}")
+
+    async def teardown():
         stop_event.set()
         audio_queue.put(None)
-        t.join()
+        await asyncio.to_thread(t.join)
+        await live.wait_for_tasks(llm_router.LATENCY_BUDGET_SECONDS)
+        ADMISSION.release()
+        TRANSCRIPTS.end_session(user_id, session_id)
+        await asyncio.to_thread(SHARED.delete, "sessions", live.resume_token)
+        logger.info(f"Answer cache stats for {user_email}: {cache_stats.to_dict()} (resumed {live.resumes}x)")
+
+    live.teardown = teardown
+    LIVE_SESSIONS.add(live)
+    await asyncio.to_thread(SHARED.set, "sessions", live.resume_token, {
+        "worker": shared_state.WORKER_ID, "session_id": session_id, "email": user_email
+    }, ttl=SESSION_OWNER_TTL)
+    count_usage("sessions_started")
+    t.start()
+
+    await live.attach(websocket)
+    await run_connection(websocket, live)
@@ -22,6 +22,7 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "super_secret_key_change_this") 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
 GOOGLE_CLIENT_ID = "595917889227-2b4948v2eove1lrv5fjptpoardnu5l69.apps.googleusercontent.com"
 
 # OAuth2 Scheme
@@ -53,6 +54,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_token_subject(token: str) -> Optional[str]:
+    """Email from a valid JWT, without a DB lookup (used for fast session resume)."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
 def verify_google_token(token: str):
     try:
         id_info = id_token.verify_oauth2_token(token, requests.Request(), GOOGLE_CLIENT_ID)
@@ -86,3 +95,11 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         )
         
     return user
+
+def get_admin_user(current_user: models.User = Depends(get_current_user)):
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
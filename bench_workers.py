@@ -0,0 +1,144 @@
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+
+# Throughput of a CPU-bound endpoint against uvicorn --workers N, with state shared
+# through the SQLite backend. Every request sends a different JD, so /update_context
+# re-indexes it each time instead of hitting the cached index. Also checks that every
+# worker answers and sees the same shared counters.
+#
+#   python bench_workers.py --workers 1 2 4 --seconds 10 --clients 16
+
+HOST = "127.0.0.1"
+JD_TEXT = "\n".join(
+    f"Requirements:\nExperience with Python, FastAPI, SQL, distributed systems and cloud item {i}.\n"
+    f"Responsibilities:\nDesign, build and operate low-latency services for component {i}."
+    for i in range(150)
+)
+
+
+def post_context(conn, company, n):
+    jd = f"{JD_TEXT}\nAbout the team:\nRequest {company}-{n} builds realtime interview tooling."
+    body = urllib.parse.urlencode({"jd": jd, "company": company})
+    conn.request("POST", "/update_context", body, {"Content-Type": "application/x-www-form-urlencoded"})
+    resp = conn.getresponse()
+    resp.read()
+    return resp.status
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection(HOST, port, timeout=10)
+    conn.request("GET", path)
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    return data
+
+
+def client_loop(args):
+    port, seconds, client_id = args
+    conn = http.client.HTTPConnection(HOST, port, timeout=30)
+    done = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            if post_context(conn, f"bench-{client_id}", done + errors) == 200:
+                done += 1
+            else:
+                errors += 1
+        except Exception:
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(HOST, port, timeout=30)
+    conn.close()
+    return done, errors
+
+
+def start_server(workers, port, tmpdir):
+    env = dict(
+        os.environ,
+        DB_STRING=f"sqlite:///{tmpdir}/app.db",
+        LLM_FAKE="true",
+        SHARED_STATE_BACKEND="sqlite",
+        SHARED_STATE_PATH=f"{tmpdir}/state.db",
+    )
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    # Create tables up front; workers racing create_all on a fresh DB can crash one of them
+    subprocess.run(
+        [sys.executable, "-c", "import models; from database import engine; models.Base.metadata.create_all(bind=engine)"],
+        env=env, cwd=cwd, check=True,
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", HOST, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, cwd=cwd,
+    )
+    for _ in range(120):
+        try:
+            get_json(port, "/api/load")
+            return proc
+        except Exception:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError(f"Server with {workers} workers did not start")
+
+
+def check_consistency(port, workers, probes_per_worker=50):
+    """Collect the shared counter from each worker (new connection per probe)."""
+    seen = {}
+    for _ in range(probes_per_worker * workers):
+        stats = get_json(port, "/api/cluster/stats")
+        seen[stats["worker"]] = stats["usage"].get("context_updates", 0)
+        if len(seen) == workers:
+            break
+    return seen
+
+
+def run(workers, port, seconds, clients):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        proc = start_server(workers, port, tmpdir)
+        try:
+            with ProcessPoolExecutor(max_workers=clients) as pool:
+                started = time.perf_counter()
+                results = list(pool.map(client_loop, [(port, seconds, i) for i in range(clients)]))
+                wall = time.perf_counter() - started
+            done = sum(r[0] for r in results)
+            errors = sum(r[1] for r in results)
+            seen = check_consistency(port, workers)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    # Only meaningful if every worker answered; one worker agreeing with itself proves nothing
+    consistent = len(seen) == workers and set(seen.values()) == {done}
+    return {
+        "workers": workers,
+        "requests": done,
+        "errors": errors,
+        "rps": round(done / wall, 1),
+        "workers_seen": len(seen),
+        "consistent": consistent,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark throughput vs uvicorn worker count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()}")
+    baseline = None
+    for n in sorted(set(args.workers)):
+        result = run(n, args.port, args.seconds, args.clients)
+        baseline = baseline or result["rps"]
+        result["speedup"] = round(result["rps"] / baseline, 2) if baseline else 0.0
+        print(json.dumps(result))
@@ -0,0 +1,142 @@
+import math
+import re
+from collections import Counter
+
+# Config
+CHUNK_MAX_WORDS = 120
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+KNOWN_HEADINGS = {
+    "summary", "professional summary", "profile", "objective", "experience", "work experience",
+    "professional experience", "employment", "projects", "education", "skills", "technical skills",
+    "certifications", "achievements", "awards", "publications", "responsibilities", "requirements",
+    "qualifications", "preferred qualifications", "about the role", "about us", "what you'll do",
+    "what we're looking for", "benefits",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "our", "so", "that", "the", "this", "to", "was", "we",
+    "what", "with", "you", "your", "about", "tell", "can", "do", "did", "how",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token is close enough for Gemini budgeting
+    return max(1, len(text) // 4)
+
+
+def tokenize(text: str):
+    return [t for t in re.findall(r"[a-z0-9+#.]+", text.lower()) if t not in STOPWORDS]
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    if not words or len(words) > 6:
+        return False
+    # All-caps alone isn't enough: a name line ("JANE SMITH") or a skills line would be taken for one
+    bare = line.strip().rstrip(":").lower()
+    return bare in KNOWN_HEADINGS or line.strip().endswith(":")
+
+
+def split_sections(text: str, source: str):
+    """Split a document into heading-scoped chunks of at most CHUNK_MAX_WORDS words."""
+    chunks = []
+    heading = ""
+    buffer = []
+
+    def flush():
+        words = " ".join(buffer).split()
+        if not words and heading:
+            # A heading with no body is still content (often a job title or employer line)
+            chunks.append({"source": source, "heading": heading, "text": heading, "order": len(chunks)})
+        for i in range(0, len(words), CHUNK_MAX_WORDS):
+            body = " ".join(words[i:i + CHUNK_MAX_WORDS])
+            chunks.append({
+                "source": source,
+                "heading": heading,
+                "text": f"{heading}\n{body}" if heading else body,
+                "order": len(chunks),
+            })
+        buffer.clear()
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if _is_heading(line):
+            flush()
+            heading = line.rstrip(":")
+            continue
+        buffer.append(line)
+    flush()
+    return chunks
+
+
+class BM25Index:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.doc_terms = [Counter(tokenize(c["text"])) for c in chunks]
+        self.doc_lens = [sum(tf.values()) for tf in self.doc_terms]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        df = Counter()
+        for tf in self.doc_terms:
+            df.update(tf.keys())
+        n = len(chunks)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query: str):
+        terms = tokenize(query)
+        out = []
+        for tf, length in zip(self.doc_terms, self.doc_lens):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_len) if self.avg_len else BM25_K1
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    score += self.idf[t] * f * (BM25_K1 + 1) / (f + norm)
+            out.append(score)
+        return out
+
+
+class ContextIndex:
+    """Resume and JD split into sections and indexed once per upload."""
+
+    def __init__(self, resume: str, jd: str):
+        self.by_source = {
+            "resume": BM25Index(split_sections(resume, "resume")),
+            "jd": BM25Index(split_sections(jd, "jd")),
+        }
+
+    def retrieve(self, source: str, query: str, budget_tokens: int, top_k: int = None, pinned=()):
+        """Best-scoring chunks for query that fit the budget, returned in document order."""
+        index = self.by_source[source]
+        scores = index.scores(query) if query else [0.0] * len(index.chunks)
+        ranked = sorted(range(len(index.chunks)), key=lambda i: (-scores[i], i))
+        ranked = [i for i in pinned if i < len(index.chunks)] + [i for i in ranked if i not in pinned]
+
+        picked = []
+        used = 0
+        for i in ranked:
+            if top_k is not None and len(picked) >= top_k + len(pinned):
+                break
+            cost = estimate_tokens(index.chunks[i]["text"])
+            if used + cost > budget_tokens:
+                continue
+            picked.append(i)
+            used += cost
+        return [index.chunks[i] for i in sorted(picked)]
+
+    def pack(self, source: str, budget_tokens: int, query: str = ""):
+        """Whole document if it fits, otherwise the most relevant sections.
+
+        Returns (text, omitted_section_count) so callers can report what was left out.
+        """
+        index = self.by_source[source]
+        chunks = self.retrieve(source, query, budget_tokens)
+        return render(chunks), len(index.chunks) - len(chunks)
+
+
+def render(chunks) -> str:
+    return "\n\n".join(c["text"] for c in chunks)
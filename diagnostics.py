@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+# Config
+LOOP_LAG_THRESHOLD_SECONDS = float(os.getenv("LOOP_LAG_THRESHOLD", "0.25"))
+LOOP_HEARTBEAT_SECONDS = 0.05
+MAX_INCIDENTS = 50
+PROFILE_INTERVAL_SECONDS = 0.005
+PROFILE_MAX_SECONDS = 60
+
+
+class LoopLagMonitor:
+    """Detects event-loop stalls and records what was running when they happened.
+
+    A coroutine on the loop bumps a heartbeat; a watchdog thread notices when the
+    heartbeat goes stale and grabs the loop thread's stack while it is still blocked.
+    """
+
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD_SECONDS):
+        self.threshold = threshold
+        self.incidents = deque(maxlen=MAX_INCIDENTS)
+        self.max_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._loop_thread_id = None
+        self._current = None
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + LOOP_HEARTBEAT_SECONDS
+            await asyncio.sleep(LOOP_HEARTBEAT_SECONDS)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = now - expected
+            self.max_lag = max(self.max_lag, lag)
+            if self._current is not None:
+                # Stall is over: record how long the blocking callback actually ran
+                incident, self._current = self._current, None
+                incident["duration_ms"] = int(lag * 1000)
+                logger.warning(
+                    f"Event loop blocked for {incident['duration_ms']}ms in:\n" + "".join(incident["stack"][-8:])
+                )
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            stalled_for = time.monotonic() - self._last_beat
+            if stalled_for < self.threshold or self._current is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            incident = {
+                "at": time.time(),
+                "duration_ms": None,  # Filled in when the loop comes back
+                "stack": traceback.format_stack(frame),
+            }
+            self._current = incident
+            self.incidents.append(incident)
+
+    def snapshot(self):
+        return {
+            "threshold_ms": int(self.threshold * 1000),
+            "max_lag_ms": int(self.max_lag * 1000),
+            "incidents": [
+                {"at": i["at"], "duration_ms": i["duration_ms"], "stack": "".join(i["stack"])}
+                for i in reversed(self.incidents)
+            ],
+        }
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL_SECONDS) -> str:
+    """Sample every thread's stack for `seconds` and return collapsed stacks.
+
+    Output is one `thread;outer;...;inner count` line per unique stack, the input
+    format for flamegraph.pl / speedscope. Blocking; run it off the event loop.
+    """
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    me = threading.get_ident()
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {n}" for stack, n in counts.most_common())
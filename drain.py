@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Config
+DRAIN_DEADLINE_SECONDS = float(os.getenv("DRAIN_DEADLINE_SECONDS", "600"))
+RECONNECT_SPREAD_SECONDS = float(os.getenv("RECONNECT_SPREAD_SECONDS", "30"))
+WS_SERVICE_RESTART = 1012
+
+
+class DrainController:
+    """Takes a worker out of rotation ahead of a deploy.
+
+    1. Admission stops accepting sessions (/api/load goes 503).
+    2. Live interviews run until they end or the deadline passes.
+    3. Buffered transcripts are flushed.
+    4. Remaining clients get a `reconnect` message with a random delay in
+       [0, RECONNECT_SPREAD_SECONDS) and are closed with 1012, so they come
+       back spread out rather than all at once.
+    """
+
+    def __init__(self, admission, live_sessions, transcripts):
+        self.admission = admission
+        self.live_sessions = live_sessions
+        self.transcripts = transcripts
+        self.state = "serving"      # serving -> draining -> drained
+        self.started_at = None
+        self.deadline_at = None
+        self.reconnected = 0
+        self._task = None
+
+    def begin(self, deadline_seconds: float = DRAIN_DEADLINE_SECONDS) -> bool:
+        if self.state != "serving":
+            return False
+        self.state = "draining"
+        self.started_at = time.time()
+        self.deadline_at = self.started_at + deadline_seconds
+        self.admission.begin_drain(RECONNECT_SPREAD_SECONDS)
+        logger.warning(f"Drain started: {len(self.live_sessions)} live sessions, deadline {deadline_seconds:.0f}s")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    async def _run(self):
+        while len(self.live_sessions) and time.time() < self.deadline_at:
+            await asyncio.sleep(1)
+
+        remaining = self.live_sessions.all()
+        await asyncio.gather(*(self._send_away(live) for live in remaining), return_exceptions=True)
+        self.reconnected = len(remaining)
+
+        ok = await asyncio.to_thread(self.transcripts.flush)
+        if not ok:
+            logger.error("Drain: transcript flush failed, some events are still buffered")
+        self.state = "drained"
+        logger.warning(f"Drain complete: {self.reconnected} sessions asked to reconnect")
+
+    async def _send_away(self, live):
+        delay = random.uniform(0, RECONNECT_SPREAD_SECONDS)
+        await live.send({"type": "reconnect", "delay_ms": int(delay * 1000), "reason": "server restarting"})
+        ws = live.websocket
+        # Teardown stops the speech stream and records the session end before the socket goes
+        await self.live_sessions.close(live)
+        if ws is not None:
+            try:
+                await ws.close(code=WS_SERVICE_RESTART)
+            except Exception:
+                pass
+
+    def status(self):
+        return {
+            "state": self.state,
+            "live_sessions": len(self.live_sessions),
+            "started_at": self.started_at,
+            "deadline_at": self.deadline_at,
+            "seconds_left": max(0, int(self.deadline_at - time.time())) if self.deadline_at else None,
+            "reconnected": self.reconnected,
+            "transcripts": self.transcripts.stats(),
+        }
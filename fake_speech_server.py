@@ -0,0 +1,51 @@
+import argparse
+import time
+from concurrent import futures
+
+import grpc
+from google.cloud import speech
+
+# Minimal stand-in for the Speech API's Recognize RPC, for exercising
+# `realtime_transcribe.py --batch --endpoint localhost:50051` without GCP.
+
+RECOGNIZE_METHOD = "Recognize"
+SERVICE_NAME = "google.cloud.speech.v1.Speech"
+
+
+def make_handler(realtime_factor):
+    def recognize(request, context):
+        rate = request.config.sample_rate_hertz or 16000
+        seconds = len(request.audio.content) / 2 / rate
+        # Simulate server-side processing time proportional to audio length
+        time.sleep(seconds * realtime_factor)
+        alternative = speech.SpeechRecognitionAlternative(
+            transcript=f"[{seconds:.1f}s of audio]", confidence=1.0
+        )
+        return speech.RecognizeResponse(results=[speech.SpeechRecognitionResult(alternatives=[alternative])])
+
+    return grpc.method_handlers_generic_handler(SERVICE_NAME, {
+        RECOGNIZE_METHOD: grpc.unary_unary_rpc_method_handler(
+            recognize,
+            request_deserializer=speech.RecognizeRequest.deserialize,
+            response_serializer=speech.RecognizeResponse.serialize,
+        ),
+    })
+
+
+def serve(port=50051, workers=16, realtime_factor=0.05):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=workers))
+    server.add_generic_rpc_handlers((make_handler(realtime_factor),))
+    server.add_insecure_port(f"[::]:{port}")
+    server.start()
+    print(f"Fake Speech server listening on localhost:{port}")
+    server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Google Speech server for batch transcription tests.")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--realtime-factor", type=float, default=0.05,
+                        help="Seconds of processing per second of audio")
+    args = parser.parse_args()
+    serve(args.port, args.workers, args.realtime_factor)
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Config
+FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gemini-2.0-flash-lite-001")
+DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "gemini-2.0-flash-001")
+STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gemini-2.5-flash")
+LATENCY_BUDGET_SECONDS = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", "12"))
+HEDGE_MIN_SAMPLES = 20        # Don't hedge until p95 is meaningful
+HEDGE_FLOOR_SECONDS = 0.5     # Never hedge earlier than this...
+HEDGE_MAX_BUDGET_FRACTION = 0.5   # ...or later than this share of the budget, so the hedge has time to finish
+LATENCY_WINDOW = 500          # Samples kept per route
+LLM_MAX_THREADS = int(os.getenv("LLM_MAX_THREADS", "32"))   # Router's own pool; losers and timeouts keep a thread until they return
+
+ROUTES = {
+    "behavioral": FAST_MODEL,
+    "coding": STRONG_MODEL,
+    "general": DEFAULT_MODEL,
+}
+
+# Asks to produce or analyse code, not mentions of code, a language or a tool
+# ("your tech stack", "the algorithm you built", "how would you implement rate limiting")
+CODING_PATTERN = re.compile(
+    r"\b((write|implement|code up) (\w+ ){0,3}?(function|program|code|script|query|method|class|algorithm)|"
+    r"time complexity|space complexity|big o|leetcode|linked list|binary (search|tree)|hash ?map|"
+    r"dynamic programming|recursion|recursive|coding (problem|question|challenge|exercise)|"
+    r"(debug|optimi[sz]e|refactor|review|what does) (this|the following|my|your) (code|function|snippet|query)|"
+    r"given an? (array|string|list|integer|tree|graph|matrix))\b",
+    re.IGNORECASE,
+)
+BEHAVIORAL_PATTERN = re.compile(
+    r"\b(tell me about|describe a time|walk me through|why do you|why should|strength|weakness|"
+    r"conflict|challenge|proud|failure|team|yourself|motivat|where do you see|introduce)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_question(text: str) -> str:
+    if CODING_PATTERN.search(text):
+        return "coding"
+    if len(text.split()) <= 25 and BEHAVIORAL_PATTERN.search(text):
+        return "behavioral"
+    return "general"
+
+
+class LatencyBudgetExceeded(Exception):
+    pass
+
+
+class RouteStats:
+    def __init__(self):
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float):
+        with self._lock:
+            self.samples.append(elapsed)
+
+    def percentile(self, pct: float):
+        with self._lock:
+            data = sorted(self.samples)
+        if not data:
+            return None
+        idx = min(len(data) - 1, int(round(pct / 100 * (len(data) - 1))))
+        return data[idx]
+
+    def to_dict(self):
+        p = {f"p{q}_ms": (int(v * 1000) if v is not None else None)
+             for q, v in ((50, self.percentile(50)), (95, self.percentile(95)), (99, self.percentile(99)))}
+        return {
+            "requests": self.requests,
+            "samples": len(self.samples),
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 3) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            **p,
+        }
+
+
+class LLMRouter:
+    """Routes prompts to a model per question type and hedges slow requests.
+
+    `model_factory(name)` must return an object with a blocking
+    `generate_content(prompt)` whose result has `.text`, so a FakeModel can
+    stand in for Vertex AI locally.
+    """
+
+    def __init__(self, model_factory, routes=None, latency_budget: float = LATENCY_BUDGET_SECONDS,
+                 max_threads: int = LLM_MAX_THREADS):
+        self.model_factory = model_factory
+        self.routes = dict(routes or ROUTES)
+        self.latency_budget = latency_budget
+        self.stats = {route: RouteStats() for route in self.routes}
+        self._models = {}
+        self._lock = threading.Lock()
+        # Separate from the default executor so stuck calls can't starve asyncio.to_thread users
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="llm")
+        self.max_threads = max_threads
+        self.busy_threads = 0
+
+    def _model_for(self, route: str):
+        name = self.routes.get(route, self.routes["general"])
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self.model_factory(name)
+            return self._models[name]
+
+    def _submit(self, model, prompt):
+        self.busy_threads += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, model.generate_content, prompt)
+        future.add_done_callback(self._thread_done)
+        return future
+
+    def _thread_done(self, future):
+        self.busy_threads -= 1
+
+    def hedge_delay(self, route: str):
+        stats = self.stats[route]
+        if len(stats.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        delay = max(HEDGE_FLOOR_SECONDS, stats.percentile(95))
+        return min(delay, self.latency_budget * HEDGE_MAX_BUDGET_FRACTION)
+
+    async def generate(self, prompt: str, route: str = "general"):
+        if route not in self.routes:
+            route = "general"
+        stats = self.stats[route]
+        stats.requests += 1
+        model = self._model_for(route)
+        started = time.perf_counter()
+        deadline = started + self.latency_budget
+
+        primary = self._submit(model, prompt)
+        pending = {primary}
+        hedge = None
+
+        delay = self.hedge_delay(route)
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self.busy_threads < self.max_threads:
+                # First request is slower than p95: race a duplicate against it
+                # (skipped when the pool is full, where a hedge would only queue)
+                stats.hedges += 1
+                hedge = self._submit(model, prompt)
+                pending.add(hedge)
+
+        error = None
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+                stats.record(time.perf_counter() - started)
+                if task is hedge:
+                    stats.hedge_wins += 1
+                for other in pending:
+                    # The losing thread keeps running; just drop its result
+                    other.add_done_callback(_swallow)
+                return task.result()
+
+        for task in pending:
+            task.add_done_callback(_swallow)
+        if error is not None and not pending:
+            stats.errors += 1
+            raise error
+        # Timeouts stay out of the latency window: counting them at the budget would
+        # push p95 up to the budget and switch hedging off when the tail is worst
+        stats.timeouts += 1
+        raise LatencyBudgetExceeded(f"No answer from route '{route}' within {self.latency_budget}s")
+
+    def snapshot(self):
+        return {
+            "routes": {route: {"model": self.routes[route], **stats.to_dict()} for route, stats in self.stats.items()},
+            "latency_budget_seconds": self.latency_budget,
+            "busy_threads": self.busy_threads,
+            "max_threads": self.max_threads,
+        }
+
+
+def _swallow(task):
+    if not task.cancelled():
+        task.exception()
+
+
+class FakeModel:
+    """Local stand-in for GenerativeModel with configurable latency."""
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, name: str = "fake", latency: float = 0.05, text: str = None):
+        self.name = name
+        self.latency = latency
+        self.text = text
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency() if callable(self.latency) else self.latency)
+        return self._Response(self.text or f"[{self.name}] answer")
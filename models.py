@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Index
 from database import Base
 
 class User(Base):
@@ -17,3 +17,16 @@ class User(Base):
     # OTP Verification
     otp_code = Column(String, nullable=True)
     otp_expires_at = Column(DateTime, nullable=True)
+
+class SessionEvent(Base):
+    __tablename__ = "session_events"
+    __table_args__ = (Index("ix_session_events_user_session", "user_id", "session_id", "seq"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    session_id = Column(String(32), nullable=False, index=True)
+    seq = Column(Integer, nullable=False) # Order within the session
+    kind = Column(String(16), nullable=False) # start / transcript / answer / end
+    created_at = Column(DateTime, nullable=False)
+    question = Column(Text, nullable=True) # Only for answers
+    text = Column(Text, nullable=True)
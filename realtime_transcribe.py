@@ -1,7 +1,15 @@
-import sounddevice as sd
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from google.cloud import speech
-import queue
 
 # ----------------------------
 # Configuration
@@ -24,6 +32,8 @@ def callback(indata, frames, time, status):
 # Main function
 # ----------------------------
 def main():
+    import sounddevice as sd  # Only needed for live capture
+
     client = speech.SpeechClient()
     config = speech.RecognitionConfig(
         encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
@@ -62,8 +72,175 @@ def main():
             print("\nStopped.")
             q.put(None)
 
+# ----------------------------
+# Batch mode (recorded interviews)
+# ----------------------------
+MAX_CHUNK_SECONDS = 55      # Sync recognize accepts up to 60s per request
+MIN_CHUNK_SECONDS = 10
+FRAME_SECONDS = 0.03
+MIN_SILENCE_SECONDS = 0.3
+SILENCE_DB = -40            # Frames quieter than this (relative to peak) count as silence
+AUDIO_EXTENSIONS = (".wav", ".flac")
+
+
+def load_audio(path):
+    """Return (mono int16 samples, sample_rate)."""
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+            rate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            channels = wf.getnchannels()
+    else:
+        import soundfile as sf  # Optional dependency, FLAC only
+        data, rate = sf.read(path, dtype="int16", always_2d=True)
+        samples, channels = data.reshape(-1), data.shape[1]
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+def split_on_silence(samples, rate):
+    """Cut points (sample offsets) at silence boundaries, chunks <= MAX_CHUNK_SECONDS."""
+    frame = max(1, int(rate * FRAME_SECONDS))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return [(0, len(samples))] if len(samples) else []
+
+    frames = samples[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-9
+    db = 20 * np.log10(rms / rms.max())
+    silent = db < SILENCE_DB
+
+    # Middle of every silent run long enough to be a pause
+    min_run = max(1, int(MIN_SILENCE_SECONDS / FRAME_SECONDS))
+    candidates = []
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    for start, end in zip(np.where(edges == 1)[0], np.where(edges == -1)[0]):
+        if end - start >= min_run:
+            candidates.append(((start + end) // 2) * frame)
+
+    max_len, min_len = int(MAX_CHUNK_SECONDS * rate), int(MIN_CHUNK_SECONDS * rate)
+    bounds, start = [], 0
+    while len(samples) - start > max_len:
+        window = [c for c in candidates if start + min_len <= c <= start + max_len]
+        cut = window[-1] if window else start + max_len
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(samples)))
+    return bounds
+
+
+def make_client(endpoint=None):
+    if not endpoint:
+        return speech.SpeechClient()
+    # Plaintext gRPC to a local (fake) Speech server
+    import grpc
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
+
+    channel = grpc.insecure_channel(endpoint)
+    transport = SpeechGrpcTransport(channel=channel, credentials=AnonymousCredentials())
+    return speech.SpeechClient(transport=transport)
+
+
+def transcribe_chunk(client, audio_bytes, rate):
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=rate,
+        language_code="en-US",
+        enable_automatic_punctuation=True,
+    )
+    response = client.recognize(config=config, audio=speech.RecognitionAudio(content=audio_bytes))
+    return " ".join(r.alternatives[0].transcript.strip() for r in response.results if r.alternatives)
+
+
+def _write_record(out, path, duration, error, jobs):
+    segments = []
+    for chunk_idx, start_s, end_s, future in jobs:
+        segment = {"index": chunk_idx, "start": round(start_s, 2), "end": round(end_s, 2)}
+        try:
+            segment["transcript"] = future.result()
+        except Exception as e:
+            segment["error"] = str(e)
+        segments.append(segment)
+    record = {
+        "file": os.path.basename(path),
+        "duration_seconds": round(duration, 2),
+        "transcript": " ".join(s["transcript"] for s in segments if s.get("transcript")),
+        "segments": segments,
+    }
+    if error is not None:
+        record["error"] = error
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+
+
+def run_batch(input_dir, output_path, workers=4, endpoint=None):
+    files = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    if not files:
+        print(f"No WAV/FLAC files found in {input_dir}")
+        return
+
+    client = make_client(endpoint)  # gRPC clients are thread-safe; share one
+    started = time.perf_counter()
+    total_seconds = 0.0
+    total_chunks = 0
+    # Only one decoded file and at most 2x workers chunk copies are in memory at once;
+    # the next file is decoded while the previous one's last chunks are still in flight
+    inflight = threading.BoundedSemaphore(workers * 2)
+    pending = deque()   # (path, duration, error, jobs) in file order, written as they complete
+
+    def write_ready(out, block=False):
+        while pending and (block or all(job[3].done() for job in pending[0][3])):
+            _write_record(out, *pending.popleft())
+
+    with open(output_path, "w", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        for path in files:
+            try:
+                samples, rate = load_audio(path)
+            except Exception as e:
+                pending.append((path, 0.0, f"{type(e).__name__}: {e}", []))
+                write_ready(out)
+                continue
+            duration = len(samples) / rate
+            total_seconds += duration
+            jobs = []   # (chunk_idx, start_s, end_s, future)
+            for chunk_idx, (a, b) in enumerate(split_on_silence(samples, rate)):
+                inflight.acquire()
+                future = pool.submit(transcribe_chunk, client, samples[a:b].tobytes(), rate)
+                future.add_done_callback(lambda _: inflight.release())
+                jobs.append((chunk_idx, a / rate, b / rate, future))
+                write_ready(out)
+            total_chunks += len(jobs)
+            del samples
+            pending.append((path, duration, None, jobs))
+            write_ready(out)
+        write_ready(out, block=True)
+
+    wall = time.perf_counter() - started
+    audio_hours = total_seconds / 3600
+    print(f"Transcribed {len(files)} files / {total_chunks} chunks in {wall:.1f}s -> {output_path}")
+    print(f"Throughput: {audio_hours / (wall / 3600):.1f} audio-hours per wall-clock hour")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Live mic transcription, or batch mode for recorded interviews.")
+    parser.add_argument("--batch", metavar="DIR", help="Transcribe every WAV/FLAC file in DIR instead of the microphone")
+    parser.add_argument("--out", default="transcripts.jsonl", help="JSONL output path for batch mode")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent recognize requests in batch mode")
+    parser.add_argument("--endpoint", help="host:port of a plaintext Speech server (e.g. fake_speech_server.py)")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.out, workers=args.workers, endpoint=args.endpoint)
+    else:
+        main()
 
 
 
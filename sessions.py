@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+
+# Config
+RESUME_GRACE_SECONDS = float(os.getenv("RESUME_GRACE_SECONDS", "30"))
+OUTBOX_SIZE = 200   # Messages kept for replay after a reconnect
+CREDIT_RECHECK_SECONDS = 60     # Max age of the cached credit/is_active check used by resumes
+
+
+class LiveSession:
+    """State of one interview session that outlives its WebSocket connection.
+
+    Messages go through `send()`, which numbers them and keeps the last
+    OUTBOX_SIZE so a client reconnecting with `last_seq` gets what it missed.
+    """
+
+    def __init__(self, user_id: int, email: str, session_id: str):
+        self.user_id = user_id
+        self.email = email
+        self.session_id = session_id
+        self.resume_token = secrets.token_urlsafe(24)
+        self.audio_queue = queue.Queue()
+        self.conversation_history = []
+        self.stop_event = threading.Event()
+        self.loop = asyncio.get_running_loop()
+        self.websocket = None
+        self.teardown = None        # async callable set by the owner, run once on close
+        self.closed = False
+        self.resumes = 0
+        self.time_limit_seconds = 0
+        self.time_used_seconds = 0
+        self._credit_checked_at = 0.0
+        self.tasks = set()          # In-flight answers, awaited before the session is recorded as ended
+        self._seq = 0
+        self._outbox = deque(maxlen=OUTBOX_SIZE)
+        self._expiry = None
+
+    async def send(self, message: dict):
+        self._seq += 1
+        data = json.dumps({**message, "seq": self._seq})
+        self._outbox.append((self._seq, data))
+        ws = self.websocket
+        if ws is None:
+            return
+        try:
+            await ws.send_text(data)
+        except Exception:
+            # Connection is going away; the message stays in the outbox for replay
+            pass
+
+    def send_threadsafe(self, message: dict):
+        if not self.stop_event.is_set():
+            asyncio.run_coroutine_threadsafe(self.send(message), self.loop)
+
+    def set_credit(self, limit_seconds: int, used_seconds: int):
+        self.time_limit_seconds = limit_seconds
+        self.time_used_seconds = used_seconds
+        self._credit_checked_at = time.monotonic()
+
+    def has_credit(self) -> bool:
+        return self.time_used_seconds < self.time_limit_seconds
+
+    def credit_check_due(self) -> bool:
+        """True if a resume must re-read the user from the DB.
+
+        Heartbeats bill wall-clock time, so the cached usage plus time since the
+        check is an upper bound; only near the limit (or once stale) do we ask the DB.
+        """
+        age = time.monotonic() - self._credit_checked_at
+        return age > CREDIT_RECHECK_SECONDS or self.time_used_seconds + age >= self.time_limit_seconds
+
+    def spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def spawn_threadsafe(self, coro_fn, *args):
+        self.loop.call_soon_threadsafe(lambda: self.spawn(coro_fn(*args)))
+
+    async def wait_for_tasks(self, timeout: float):
+        """Let in-flight answers finish (and get recorded), up to `timeout` seconds."""
+        if self.tasks:
+            await asyncio.wait(list(self.tasks), timeout=timeout)
+
+    async def attach(self, websocket, last_seq: int = None):
+        """Bind a (re)connected socket and replay anything after `last_seq`.
+
+        `last_seq` is None for a brand-new session.
+        """
+        if self._expiry:
+            self._expiry.cancel()
+            self._expiry = None
+        resumed = last_seq is not None
+        last_seq = last_seq or 0
+        oldest = self._outbox[0][0] if self._outbox else self._seq + 1
+        await websocket.send_text(json.dumps({
+            "type": "session",
+            "session_id": self.session_id,
+            "resume_token": self.resume_token,
+            "resumed": resumed,
+            "gap": resumed and last_seq + 1 < oldest,
+        }))
+
+        sent = last_seq
+        while True:
+            missed = [(seq, data) for seq, data in self._outbox if seq > sent]
+            if not missed:
+                break
+            for seq, data in missed:
+                await websocket.send_text(data)
+                sent = seq
+        # No await between the last check and this assignment, so nothing slips through
+        previous, self.websocket = self.websocket, websocket
+        if previous is not None:
+            # Server hadn't noticed the old connection drop yet
+            try:
+                await previous.close()
+            except Exception:
+                pass
+        if resumed:
+            self.resumes += 1
+
+    def detach(self, websocket, on_expire):
+        """Drop the socket but keep the session alive for RESUME_GRACE_SECONDS."""
+        if self.closed or self.websocket is not websocket:
+            return  # Already closed, or replaced by a newer connection
+        self.websocket = None
+        self._expiry = self.loop.call_later(
+            RESUME_GRACE_SECONDS, lambda: asyncio.ensure_future(on_expire(self))
+        )
+
+
+class SessionRegistry:
+    def __init__(self):
+        self._by_token = {}
+
+    def add(self, live: LiveSession):
+        self._by_token[live.resume_token] = live
+
+    def get(self, resume_token: str):
+        live = self._by_token.get(resume_token)
+        return live if live and not live.closed else None
+
+    def all(self):
+        return list(self._by_token.values())
+
+    def __len__(self):
+        return len(self._by_token)
+
+    async def close(self, live: LiveSession):
+        if live.closed:
+            return
+        live.closed = True
+        self._by_token.pop(live.resume_token, None)
+        if live._expiry:
+            live._expiry.cancel()
+        if live.teardown:
+            await live.teardown()
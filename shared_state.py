@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Config
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory")   # memory | sqlite
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "/tmp/pokoai_state.db")
+WORKER_ID = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+
+
+class InProcessBackend:
+    """Plain dicts; correct only when the app runs as a single worker."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, ns, key):
+        entry = self._data.get((ns, key))
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._data[(ns, key)]
+            return None
+        return entry
+
+    def get(self, ns: str, key: str):
+        with self._lock:
+            entry = self._live(ns, key)
+            return entry[0] if entry else None
+
+    def set(self, ns: str, key: str, value, ttl: float = None):
+        with self._lock:
+            self._data[(ns, key)] = (value, time.time() + ttl if ttl else None)
+
+    def set_if_absent(self, ns: str, key: str, value, ttl: float = None) -> bool:
+        with self._lock:
+            if self._live(ns, key):
+                return False
+            self._data[(ns, key)] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, ns: str, key: str):
+        with self._lock:
+            self._data.pop((ns, key), None)
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            entry = self._live(ns, key)
+            value = (entry[0] if entry else 0) + amount
+            self._data[(ns, key)] = (value, None)
+            return value
+
+    def items(self, ns: str):
+        with self._lock:
+            keys = [k for (n, k) in self._data if n == ns]
+            return {k: entry[0] for k in keys if (entry := self._live(ns, k))}
+
+
+class SQLiteBackend:
+    """Shared by every worker on a host through one WAL-mode SQLite file.
+
+    Values are stored as JSON. Each thread gets its own connection.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL,"
+            " PRIMARY KEY (ns, key))"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; each statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, ns: str, key: str):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE ns = ? AND key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (ns, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, ns: str, key: str, value, ttl: float = None):
+        self._conn().execute(
+            "INSERT INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (ns, key, json.dumps(value), time.time() + ttl if ttl else None),
+        )
+
+    def set_if_absent(self, ns: str, key: str, value, ttl: float = None) -> bool:
+        """Set unless a live value exists (an expired one is replaced). True if set."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO kv (ns, key, value, expires_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at"
+            " WHERE kv.expires_at IS NOT NULL AND kv.expires_at < ?",
+            (ns, key, json.dumps(value), now + ttl if ttl else None, now),
+        )
+        return cur.rowcount == 1
+
+    def delete(self, ns: str, key: str):
+        self._conn().execute("DELETE FROM kv WHERE ns = ? AND key = ?", (ns, key))
+
+    def incr(self, ns: str, key: str, amount: int = 1) -> int:
+        row = self._conn().execute(
+            "INSERT INTO kv (ns, key, value) VALUES (?, ?, ?)"
+            " ON CONFLICT (ns, key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value"
+            " RETURNING value",
+            (ns, key, str(amount)),
+        ).fetchone()
+        return int(row[0])
+
+    def items(self, ns: str):
+        rows = self._conn().execute(
+            "SELECT key, value FROM kv WHERE ns = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (ns, time.time()),
+        ).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+
+def create_backend(name: str = SHARED_STATE_BACKEND):
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "memory":
+        return InProcessBackend()
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND: {name}")
+
+
+class SharedDict:
+    """One namespace read as a whole, falling back to `defaults` for missing keys.
+
+    Read through `snapshot()` so a request sees one consistent copy.
+    """
+
+    def __init__(self, backend, ns: str, defaults: dict):
+        self.backend = backend
+        self.ns = ns
+        self.defaults = dict(defaults)
+
+    def update(self, values: dict):
+        for key, value in values.items():
+            self.backend.set(self.ns, key, value)
+
+    def snapshot(self):
+        return {**self.defaults, **self.backend.items(self.ns)}
@@ -0,0 +1,81 @@
+import answer_cache
+
+CTX = answer_cache.context_key("resume", "jd", "Acme")
+
+# Pairs the hashed n-gram vectors score as near-duplicates but that need different answers
+NEAR_MISSES = [
+    ("Tell me about a time you failed", "Tell me about a time you succeeded"),
+    ("What is the time complexity of quicksort", "What is the space complexity of quicksort"),
+    ("How do you handle conflict with your manager", "How do you handle conflict with your team"),
+]
+
+PARAPHRASES = [
+    ("Tell me about a time you failed", "Tell me about a time that you failed?"),
+    ("What is your greatest weakness", "So what is your greatest weakness?"),
+    ("Walk me through your resume", "Can you walk me through your resume"),
+    ("Tell me about yourself", "Tell me a little bit about yourself."),
+    ("So tell me about yourself", "Could you briefly tell me about yourself?"),
+]
+
+
+def test_near_miss_questions_do_not_share_answers():
+    for stored, asked in NEAR_MISSES:
+        cache = answer_cache.AnswerCache()
+        cache.put(CTX, stored, "answer")
+        assert cache.get(CTX, asked) is None, (stored, asked)
+
+
+def test_paraphrases_hit():
+    for stored, asked in PARAPHRASES:
+        cache = answer_cache.AnswerCache()
+        cache.put(CTX, stored, "answer")
+        assert cache.get(CTX, asked) == "answer", (stored, asked)
+
+
+def test_followups_are_not_cached():
+    cache = answer_cache.AnswerCache()
+    for question in ["Tell me more about that", "Can you elaborate?", "How did you do that?"]:
+        assert answer_cache.is_followup(question)
+        cache.put(CTX, question, "answer")
+        assert cache.get(CTX, question) is None
+
+
+def test_cache_is_per_context():
+    cache = answer_cache.AnswerCache()
+    cache.put(CTX, "Tell me about yourself", "answer")
+    other = answer_cache.context_key("other resume", "jd", "Acme")
+    assert cache.get(other, "Tell me about yourself") is None
+
+
+# (LLM-written bank question, how the interviewer actually asks it)
+BANK_PARAPHRASES = [
+    ("So tell me about yourself", "Tell me a little bit about yourself."),
+    ("Why do you want to join Acme?", "Why do you want to work at Acme?"),
+    ("What would you say is your biggest weakness", "What is your greatest weakness?"),
+    ("Walk me through your resume", "Can you briefly walk me through your background"),
+    ("Tell me about a challenging project you worked on", "Describe the most challenging project you have worked on"),
+    ("Why are you leaving your current job?", "Why do you want to leave your current role?"),
+    ("Where do you see yourself in five years?", "Where do you see yourself in 5 years"),
+]
+
+
+def _bank(questions):
+    import answer_bank
+
+    bank = answer_bank.AnswerBank(CTX)
+    bank.add_items([{"question": q, "answer": f"banked: {q}"} for q in questions])
+    return bank
+
+
+def test_answer_bank_rejects_near_misses():
+    bank = _bank([stored for stored, _ in NEAR_MISSES])
+    for stored, asked in NEAR_MISSES:
+        assert bank.match(asked) is None, (stored, asked)
+    assert bank.match("Can you elaborate?") is None
+
+
+def test_answer_bank_matches_rephrasings():
+    bank = _bank([stored for stored, _ in BANK_PARAPHRASES])
+    for stored, asked in BANK_PARAPHRASES:
+        hit = bank.match(asked)
+        assert hit is not None and hit["question"] == stored, (stored, asked, hit)
@@ -0,0 +1,38 @@
+import context_index
+
+RESUME = """JANE SMITH
+jane.smith@example.com | +1 555 0100
+SUMMARY
+Backend engineer with eight years building payment systems.
+EXPERIENCE
+Acme Corp - Senior Engineer
+Led the migration of the ledger service to Postgres.
+SKILLS
+Python, Go, Kafka, PostgreSQL
+"""
+
+
+def test_name_line_is_not_a_heading():
+    chunks = context_index.split_sections(RESUME, "resume")
+    assert chunks[0]["heading"] == ""
+    assert "JANE SMITH" in chunks[0]["text"]
+    assert "jane.smith@example.com" in chunks[0]["text"]
+
+
+def test_header_is_pinned_into_retrieval():
+    index = context_index.ContextIndex(RESUME, "We need a Kafka expert.")
+    chunks = index.retrieve("resume", "Tell me about Kafka", 200, top_k=1, pinned=(0,))
+    text = context_index.render(chunks)
+    assert "JANE SMITH" in text
+    assert "Kafka" in text
+
+
+def test_known_headings_split_sections():
+    chunks = context_index.split_sections(RESUME, "resume")
+    assert [c["heading"] for c in chunks] == ["", "SUMMARY", "EXPERIENCE", "SKILLS"]
+
+
+def test_heading_without_body_is_kept():
+    chunks = context_index.split_sections("EXPERIENCE\nAcme Corp:\nLed the ledger migration.", "resume")
+    assert [c["text"] for c in chunks][0] == "EXPERIENCE"
+    assert any("Acme Corp" in c["text"] for c in chunks)
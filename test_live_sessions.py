@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+
+# app connects to the database and picks the model backend at import time
+os.environ["DB_STRING"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["LLM_FAKE"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import app
+import auth
+import models
+import sessions
+from database import SessionLocal
+
+
+def _user(time_used_seconds=0, time_limit_seconds=1200):
+    email = f"{uuid.uuid4().hex[:8]}@example.com"
+    db = SessionLocal()
+    try:
+        db.add(models.User(email=email, is_active=True, time_used_seconds=time_used_seconds,
+                           time_limit_seconds=time_limit_seconds))
+        db.commit()
+    finally:
+        db.close()
+    return email, auth.create_access_token({"sub": email})
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+class FakeSpeechClient:
+    """Consumes audio until the session stops, without reaching Google."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def streaming_recognize(self, config, requests):
+        for _ in requests:
+            pass
+        return []
+
+
+@pytest.fixture(autouse=True)
+def fake_speech(monkeypatch):
+    monkeypatch.setattr(app.speech, "SpeechClient", FakeSpeechClient)
+
+
+@pytest.fixture
+def client():
+    with TestClient(app.app) as c:
+        yield c
+
+
+def test_queued_client_leaving_frees_its_spot(client, monkeypatch):
+    monkeypatch.setattr(app.ADMISSION, "max_sessions", 1)
+    _, first_token = _user()
+    _, queued_token = _user()
+    _, next_token = _user()
+
+    with client.websocket_connect(f"/ws?token={first_token}") as first:
+        assert first.receive_json()["type"] == "session"
+
+        with client.websocket_connect(f"/ws?token={queued_token}") as queued:
+            assert queued.receive_json() == {"type": "queued", "position": 1}
+        _wait_for(lambda: app.ADMISSION.snapshot()["queued"] == 0)
+
+        # The spot the closed tab held goes to the next client, not to nobody
+        with client.websocket_connect(f"/ws?token={next_token}") as waiting:
+            assert waiting.receive_json() == {"type": "queued", "position": 1}
+            first.send_text(json.dumps({"type": "stop"}))
+            assert waiting.receive_json()["type"] == "session"
+            waiting.send_text(json.dumps({"type": "stop"}))
+
+
+def test_in_flight_answer_is_written_before_end_on_shutdown():
+    _, token = _user()
+    with TestClient(app.app) as client:
+        with client.websocket_connect(f"/ws?token={token}") as ws:
+            assert ws.receive_json()["type"] == "session"
+            live = app.LIVE_SESSIONS.all()[0]
+
+            async def slow_answer():
+                await asyncio.sleep(1)
+                app.TRANSCRIPTS.record(live.user_id, live.session_id, "answer", text="late", question="q")
+
+            live.spawn_threadsafe(slow_answer)
+            # Connection drops mid-answer; the session waits for a resume that never comes
+            ws.close(code=4000)
+            _wait_for(lambda: live.websocket is None)
+    # Server shut down with the answer still being generated
+
+    db = SessionLocal()
+    try:
+        events = (db.query(models.SessionEvent)
+                  .filter(models.SessionEvent.session_id == live.session_id)
+                  .order_by(models.SessionEvent.seq))
+        assert [e.kind for e in events] == ["start", "answer", "end"]
+    finally:
+        db.close()
+
+
+def test_resume_refused_once_credit_runs_out(client):
+    email, token = _user()
+    with client.websocket_connect(f"/ws?token={token}") as ws:
+        resume_token = ws.receive_json()["resume_token"]
+        ws.close(code=4000)
+    _wait_for(lambda: app.LIVE_SESSIONS.get(resume_token).websocket is None)
+
+    # Fresh credit: the resume goes through
+    with client.websocket_connect(f"/ws?token={token}&resume={resume_token}&last_seq=1") as ws:
+        assert ws.receive_json()["resumed"] is True
+        ws.close(code=4000)
+    live = app.LIVE_SESSIONS.get(resume_token)
+    _wait_for(lambda: live.websocket is None)
+
+    db = SessionLocal()
+    try:
+        db.query(models.User).filter(models.User.email == email).update({"time_used_seconds": 1200})
+        db.commit()
+    finally:
+        db.close()
+    live._credit_checked_at -= sessions.CREDIT_RECHECK_SECONDS * 2
+
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(f"/ws?token={token}&resume={resume_token}&last_seq=1") as ws:
+            ws.receive_json()
+    assert refused.value.code == 1008
+    _wait_for(lambda: app.LIVE_SESSIONS.get(resume_token) is None)
@@ -0,0 +1,76 @@
+import asyncio
+import itertools
+
+import pytest
+
+import llm_router
+from llm_router import FakeModel, LLMRouter, classify_question
+
+CODING = [
+    "Write a function that reverses a linked list",
+    "Can you implement an LRU cache class in Python?",
+    "What is the time complexity of your solution?",
+    "Given an array of integers, return the two that sum to a target",
+    "What does this code do?",
+]
+
+NOT_CODING = [
+    ("Tell me about the recommendation algorithm you built", "behavioral"),
+    ("How would you implement rate limiting in your last project?", "general"),
+    ("What is your experience with Python and Kafka?", "general"),
+    ("Walk me through your tech stack", "behavioral"),
+    ("Tell me about a time you had a conflict with your team", "behavioral"),
+]
+
+
+def test_coding_requests_route_to_coding():
+    for question in CODING:
+        assert classify_question(question) == "coding", question
+
+
+def test_mentions_of_code_do_not_route_to_coding():
+    for question, route in NOT_CODING:
+        assert classify_question(question) == route, question
+
+
+def _seed(router, route, elapsed=0.05):
+    for _ in range(llm_router.HEDGE_MIN_SAMPLES):
+        router.stats[route].record(elapsed)
+
+
+def test_slow_primary_is_hedged():
+    # Only the first call hangs; the duplicate sent after the hedge delay answers
+    calls = itertools.count()
+    model = FakeModel(latency=lambda: 1.5 if next(calls) == 0 else 0.01, text="hedged")
+    router = LLMRouter(lambda name: model, latency_budget=1.2, max_threads=4)
+    _seed(router, "general")
+
+    assert asyncio.run(router.generate("prompt")).text == "hedged"
+    stats = router.stats["general"]
+    assert (stats.hedges, stats.hedge_wins, stats.timeouts) == (1, 1, 0)
+
+
+def test_no_hedge_before_enough_samples():
+    router = LLMRouter(lambda name: FakeModel(latency=0.01), max_threads=4)
+    asyncio.run(router.generate("prompt"))
+    assert router.stats["general"].hedges == 0
+
+
+def test_timeout_raises_and_stays_out_of_latency_window():
+    router = LLMRouter(lambda name: FakeModel(latency=0.5), latency_budget=0.1, max_threads=4)
+    with pytest.raises(llm_router.LatencyBudgetExceeded):
+        asyncio.run(router.generate("prompt"))
+    stats = router.stats["general"]
+    assert stats.timeouts == 1
+    assert len(stats.samples) == 0
+
+
+def test_model_error_is_raised():
+    class Broken:
+        def generate_content(self, prompt):
+            raise RuntimeError("quota exceeded")
+
+    router = LLMRouter(lambda name: Broken(), max_threads=4)
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.generate("prompt"))
+    assert router.stats["general"].errors == 1
@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+from sqlalchemy import insert
+
+import models
+
+logger = logging.getLogger(__name__)
+
+# Config
+FLUSH_INTERVAL_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "2"))
+FLUSH_BATCH_SIZE = int(os.getenv("TRANSCRIPT_FLUSH_BATCH", "200"))
+MAX_BUFFERED_EVENTS = int(os.getenv("TRANSCRIPT_MAX_BUFFERED", "10000"))
+MAX_RETRY_SECONDS = 30
+
+
+class TranscriptStore:
+    """Buffers session events in memory and bulk-inserts them from a background thread.
+
+    `record()` never touches the database, so it is safe on the event loop and in
+    speech threads. The buffer is capped at MAX_BUFFERED_EVENTS; if the DB is down
+    long enough to fill it, the oldest events are dropped and counted.
+    """
+
+    def __init__(self, session_factory, max_buffered: int = MAX_BUFFERED_EVENTS,
+                 batch_size: int = FLUSH_BATCH_SIZE, interval: float = FLUSH_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.max_buffered = max_buffered
+        self.batch_size = batch_size
+        self.interval = interval
+        self.flushed_total = 0
+        self.dropped_total = 0
+        self._buffer = deque()
+        self._seq = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="transcript-flusher", daemon=True)
+            self._thread.start()
+
+    def begin_session(self, user_id: int, company: str = "") -> str:
+        session_id = uuid.uuid4().hex
+        self.record(user_id, session_id, "start", text=company)
+        return session_id
+
+    def end_session(self, user_id: int, session_id: str):
+        self.record(user_id, session_id, "end")
+        with self._cond:
+            self._seq.pop(session_id, None)
+
+    def record(self, user_id: int, session_id: str, kind: str, text: str = None, question: str = None):
+        with self._cond:
+            seq = self._seq.get(session_id, 0)
+            self._seq[session_id] = seq + 1
+            if len(self._buffer) >= self.max_buffered:
+                self._buffer.popleft()
+                self.dropped_total += 1
+            self._buffer.append({
+                "user_id": user_id,
+                "session_id": session_id,
+                "seq": seq,
+                "kind": kind,
+                "created_at": datetime.utcnow(),
+                "question": question,
+                "text": text,
+            })
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _take_batch(self):
+        with self._cond:
+            n = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(n)]
+
+    def _requeue(self, batch):
+        with self._cond:
+            room = self.max_buffered - len(self._buffer)
+            keep = batch[-room:] if room > 0 else []
+            self.dropped_total += len(batch) - len(keep)
+            self._buffer.extendleft(reversed(keep))
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.SessionEvent), batch)
+            db.commit()
+        finally:
+            db.close()
+
+    def flush(self) -> bool:
+        """Write everything currently buffered. Returns False if a write failed."""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return True
+            try:
+                self._write(batch)
+                self.flushed_total += len(batch)
+            except Exception as e:
+                logger.error(f"Transcript flush failed ({len(batch)} events): {e}")
+                self._requeue(batch)
+                return False
+
+    def _run(self):
+        backoff = self.interval
+        ok = True
+        while True:
+            with self._cond:
+                if not ok:
+                    # DB is failing: back off fully, only a shutdown cuts the wait short
+                    self._cond.wait_for(lambda: self._stopping, timeout=backoff)
+                elif not self._stopping and len(self._buffer) < self.batch_size:
+                    self._cond.wait(timeout=self.interval)
+                stopping = self._stopping
+            ok = self.flush()
+            backoff = self.interval if ok else min(MAX_RETRY_SECONDS, backoff * 2)
+            if stopping:
+                if not ok:
+                    logger.error(f"Shutting down with {self.stats()['buffered']} unsaved transcript events")
+                return
+
+    def stop(self, timeout: float = 10):
+        """Flush remaining events and stop the flusher thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        with self._cond:
+            buffered = len(self._buffer)
+        return {"buffered": buffered, "flushed_total": self.flushed_total, "dropped_total": self.dropped_total}